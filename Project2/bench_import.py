@@ -0,0 +1,32 @@
+import os
+import sys
+import statistics
+import subprocess
+
+# ------------------------------
+# 导入耗时测试
+# ------------------------------
+# 每个模块在全新解释器中导入若干次，取中位数；同时检查导入后是否加载了 matplotlib
+# 用于衡量工作进程 / 命令行每次启动需要付出的导入开销
+
+MODULES = ["wm", "wm_DCT", "wm_eval", "wm_bank", "wm_refstore", "wm_video"]
+BASELINE = ["cv2", "pywt", "matplotlib.pyplot"]
+
+def time_import(module, repeat=5):
+    code = (f"import time, sys; t = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - t, 'matplotlib' in sys.modules)")
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples, loads_mpl = [], False
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True,
+                             text=True, check=True).stdout.split()
+        samples.append(float(out[0]))
+        loads_mpl = out[1] == "True"
+    return statistics.median(samples), loads_mpl
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'模块':<20}{'导入耗时(ms)':>14}  加载matplotlib")
+    for module in BASELINE + MODULES:
+        seconds, loads_mpl = time_import(module, repeat)
+        print(f"{module:<20}{seconds * 1000:>14.1f}  {loads_mpl}")
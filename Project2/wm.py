@@ -1,16 +1,13 @@
 from PIL import Image, ImageDraw, ImageFont, ImageEnhance
 import numpy as np
 import sys
-import matplotlib.pyplot as plt
+from functools import lru_cache
 
 def embedTextWatermarkLSB(imagePath, text, fontSize=50):
     img = Image.open(imagePath).convert("RGB")
     wm = Image.new("1", img.size, 0)
     draw = ImageDraw.Draw(wm)
-    try:
-        font = ImageFont.truetype("arial.ttf", fontSize)
-    except:
-        font = ImageFont.load_default()
+    font = loadFont(fontSize)
     draw.text((10, 10), text, fill=1, font=font)
     wmData = np.array(wm)
     imgData = np.array(img)
@@ -25,12 +22,94 @@ def extractWatermarkLSB(watermarkedImage):
     wmData = (wmData * 255).astype(np.uint8)
     return Image.fromarray(wmData, mode="L")
 
+# ------------------------------
+# 分块 LSB（超大图像）
+# ------------------------------
+
+@lru_cache(maxsize=32)
+def loadFont(fontSize=50, fontPath="arial.ttf"):
+    try:
+        return ImageFont.truetype(fontPath, fontSize)
+    except:
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=256)
+def renderTextBitmap(text, fontSize=50, position=(10, 10), fontPath="arial.ttf"):
+    """只渲染文字的外接矩形，返回 (0/1 位图, 左上角坐标)，与 embedTextWatermarkLSB 的整幅画布等价
+    结果按 (text, fontSize, position, fontPath) 缓存，调用方不要修改返回的位图"""
+    font = loadFont(fontSize, fontPath)
+    left, top, right, bottom = ImageDraw.Draw(Image.new("1", (1, 1))).textbbox((0, 0), text, font=font)
+    wm = Image.new("1", (max(right - left, 1), max(bottom - top, 1)), 0)
+    ImageDraw.Draw(wm).text((-left, -top), text, fill=1, font=font)
+    return np.array(wm, dtype=np.uint8), (position[0] + left, position[1] + top)
+
+def openImageArray(path, shape=None, mode="r"):
+    """以内存映射方式打开 HxWxC uint8 图像: .npy / .tif(.tiff, 需 tifffile, 未压缩) / 原始字节(需给出 shape)"""
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode=mode)
+    if path.endswith((".tif", ".tiff")):
+        import tifffile
+        return tifffile.memmap(path, mode=mode)
+    if shape is None:
+        raise ValueError("原始字节文件需要指定 shape=(H, W, C)")
+    return np.memmap(path, dtype=np.uint8, mode=mode, shape=shape)
+
+def createImageArray(path, shape):
+    """创建可写的内存映射输出数组，格式由扩展名决定"""
+    if path.endswith(".npy"):
+        return np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=shape)
+    if path.endswith((".tif", ".tiff")):
+        import tifffile
+        photometric = "rgb" if len(shape) == 3 else "minisblack"
+        return tifffile.memmap(path, shape=shape, dtype=np.uint8, photometric=photometric)
+    return np.memmap(path, dtype=np.uint8, mode="w+", shape=shape)
+
+def embedBitmapLSB(tile, bitmap, origin, offset=(0, 0), out=None):
+    """对一个 HxWxC 分块嵌入位图：清最低位后，与位图重叠的区域按位或（所有通道一次广播）
+    origin 为位图在整幅图中的 (x, y)，offset 为分块在整幅图中的 (x, y)"""
+    out = np.bitwise_and(tile, 0xFE, out=out)
+    h, w = tile.shape[:2]
+    bh, bw = bitmap.shape
+    x0, y0 = max(origin[0], offset[0]), max(origin[1], offset[1])
+    x1, y1 = min(origin[0] + bw, offset[0] + w), min(origin[1] + bh, offset[1] + h)
+    if x0 < x1 and y0 < y1:
+        bits = bitmap[y0 - origin[1]:y1 - origin[1], x0 - origin[0]:x1 - origin[0]]
+        out[y0 - offset[1]:y1 - offset[1], x0 - offset[0]:x1 - offset[0]] |= bits[:, :, None]
+    return out
+
+def embedTextWatermarkLSBTiled(inputPath, outputPath, text, fontSize=50, tileSize=1024, shape=None):
+    """分块版 embedTextWatermarkLSB：输入输出均为内存映射数组，逐块处理并逐行刷新到磁盘"""
+    src = openImageArray(inputPath, shape)
+    if src.ndim != 3 or src.shape[2] != 3:
+        raise ValueError("分块模式要求 HxWx3 的 RGB 数组")
+    dst = createImageArray(outputPath, src.shape)
+    bitmap, origin = renderTextBitmap(text, fontSize)
+    h, w = src.shape[:2]
+    for y in range(0, h, tileSize):
+        for x in range(0, w, tileSize):
+            embedBitmapLSB(src[y:y + tileSize, x:x + tileSize], bitmap, origin, (x, y),
+                           out=dst[y:y + tileSize, x:x + tileSize])
+        dst.flush()
+    return bitmap, origin
+
+def extractWatermarkLSBTiled(inputPath, outputPath, tileSize=1024, shape=None):
+    """分块版 extractWatermarkLSB：输出 HxW 的 0/255 灰度内存映射数组"""
+    src = openImageArray(inputPath, shape)
+    h, w = src.shape[:2]
+    dst = createImageArray(outputPath, (h, w))
+    for y in range(0, h, tileSize):
+        for x in range(0, w, tileSize):
+            block = dst[y:y + tileSize, x:x + tileSize]
+            np.bitwise_and(src[y:y + tileSize, x:x + tileSize, 0], 1, out=block)
+            block *= 255
+        dst.flush()
+    return dst
+
 def calcNCC(wm1, wm2):
-    arr1 = np.array(wm1, dtype=np.float32)
-    arr2 = np.array(wm2, dtype=np.float32)
-    numerator = np.sum((arr1 - arr1.mean()) * (arr2 - arr2.mean()))
-    denominator = np.sqrt(np.sum((arr1 - arr1.mean())**2) * np.sum((arr2 - arr2.mean())**2))
-    return numerator / denominator if denominator != 0 else 0
+    # wm_metrics 依赖 OpenCV，在函数内导入，保持 wm.py（及 wm_batch 子进程）只依赖 PIL 与 NumPy
+    from wm_metrics import ncc
+    # float32 同时接受 bool（PIL "1" 模式）与浮点输入，不会截断
+    return ncc(np.asarray(wm1, dtype=np.float32), np.asarray(wm2, dtype=np.float32))
 
 def testRobustness(watermarkedImage):
     attacks = []
@@ -51,6 +130,7 @@ def testRobustness(watermarkedImage):
     return attacks, labels
 
 def main():
+    import matplotlib.pyplot as plt
     imagePath = "./Pics/test.png"
     text = "test watermark"
 
@@ -1,11 +1,14 @@
 import cv2
 import numpy as np
 import pywt
-import matplotlib.pyplot as plt
 import os
 import sys
 from pathlib import Path
-from matplotlib.font_manager import FontProperties
+
+from wm_metrics import psnr, nc
+from wm_sync import Synchronizer
+
+# matplotlib 只在绘图函数中按需导入：嵌入/提取/指标等核心接口不承担绘图库的导入开销
 
 # 定义文件路径
 HOST_PATH = "./Pics/test.png"  # 宿主图像路径
@@ -13,6 +16,8 @@ WATERMARKED_PATH = "watermarked.jpg"  # 含水印图像保存路径
 RESULTS_DIR = "./results"  # 结果目录
 
 def set_chinese_font():
+    import matplotlib.pyplot as plt
+    from matplotlib.font_manager import FontProperties
     try:
         # 尝试使用系统中存在的常见中文字体
         font = FontProperties(fname=r"C:\Windows\Fonts\simhei.ttf", size=10)  # 黑体
@@ -30,8 +35,16 @@ def set_chinese_font():
             plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # Mac系统
             return FontProperties(size=10)
 
-# 初始化中文字体
-chinese_font = set_chinese_font()
+# 中文字体在首次绘图时初始化
+chinese_font = None
+
+def _pyplot():
+    """导入 pyplot 并在首次调用时设置中文字体"""
+    global chinese_font
+    import matplotlib.pyplot as plt
+    if chinese_font is None:
+        chinese_font = set_chinese_font()
+    return plt
 
 def create_host_image():
     """创建512x512的测试宿主图像"""
@@ -50,21 +63,25 @@ def generate_watermark(text="test watermark", size=(128, 128)):
     return watermark
 
 def safe_compute_psnr(orig, embedded):
-    """安全的PSNR计算，自动处理尺寸差异"""
-    h, w = orig.shape
-    embedded = cv2.resize(embedded, (w, h))
-    mse = np.mean((orig - embedded) ** 2)
-    return 10 * np.log10(255**2/mse) if mse > 0 else float('inf')
-
-def embed_watermark(host, watermark, alpha=0.1):
-    """将水印嵌入宿主图像"""
+    """安全的PSNR计算，自动处理尺寸差异（以 float32 相减，避免 uint8 回绕）"""
+    return psnr(orig, embedded)
+
+def prepare_watermark(watermark, shape):
+    """把水印缩放到 LL 子带尺寸 shape=(H, W) 并二值化；同尺寸宿主可重复使用结果"""
+    wm_resized = cv2.resize(watermark, (shape[1], shape[0]))
+    return (wm_resized > 128).astype(np.float32)
+
+def embed_watermark(host, watermark, alpha=0.1, coeffs=None, wm_binary=None):
+    """将水印嵌入宿主图像
+    coeffs 为已算好的 pywt.dwt2(host, 'haar')，wm_binary 为 prepare_watermark 的结果，均可省去重复计算"""
     # 小波分解
-    coeffs = pywt.dwt2(host, 'haar')
+    if coeffs is None:
+        coeffs = pywt.dwt2(host, 'haar')
     LL, (LH, HL, HH) = coeffs
     
     # 调整水印尺寸
-    wm_resized = cv2.resize(watermark, (LL.shape[1], LL.shape[0]))
-    wm_binary = (wm_resized > 128).astype(np.float32)
+    if wm_binary is None:
+        wm_binary = prepare_watermark(watermark, LL.shape)
     
     # 嵌入低频分量
     LL_embedded = LL + alpha * wm_binary * np.max(LL)
@@ -78,31 +95,111 @@ def extract_watermark(watermarked, original, alpha=0.1):
     # 宿主图像小波分解
     coeffs_orig = pywt.dwt2(original, 'haar')
     LL_orig, _ = coeffs_orig
-    
+    return extract_watermark_ll(watermarked, LL_orig, np.max(LL_orig), alpha)
+
+def extract_watermark_ll(watermarked, LL_orig, LL_max, alpha=0.1):
+    """用保存下来的宿主 LL 子带及其最大值提取水印，不需要原图"""
     # 含水印图像小波分解
     coeffs_wm = pywt.dwt2(watermarked, 'haar')
     LL_wm, _ = coeffs_wm
     
     # 提取水印
-    extracted = (LL_wm - LL_orig) / (alpha * np.max(LL_orig))
+    extracted = (LL_wm - LL_orig) / (alpha * LL_max)
     return (np.clip(extracted, 0, 1) * 255).astype(np.uint8)
 
+# ------------------------------
+# 分块 DCT 盲水印
+# ------------------------------
+# 每个 8x8 块嵌入 1 位：调整中频系数对 (4,3)/(3,4) 的大小关系，
+# 比特 1 令 C(4,3) - C(3,4) >= strength，比特 0 反之；提取时只比较两系数，不需要原图
+# JPEG 对两个系数各自量化，差值误差最多约一个量化步长，所以 strength 缺省取
+# 目标质量 quality 下 (4,3)/(3,4) 量化步长的 JPEG_MARGIN 倍
+
+BLOCK = 8
+DCT_PAIR = ((4, 3), (3, 4))
+JPEG_QUALITY = 50  # 缺省保证经受的 JPEG 质量
+JPEG_MARGIN = 1.2
+# 标准 JPEG 亮度量化表（质量 50）中 (4,3) 与 (3,4) 的步长
+JPEG_LUMA_STEPS = (56, 51)
+
+def jpeg_strength(quality=JPEG_QUALITY, margin=JPEG_MARGIN):
+    """按 libjpeg 的质量缩放公式求 (4,3)/(3,4) 的量化步长，返回能经受该质量 JPEG 的 strength"""
+    scale = 5000 / quality if quality < 50 else 200 - 2 * quality
+    step = max(max(1, (q * scale + 50) // 100) for q in JPEG_LUMA_STEPS)
+    return margin * step
+
+def _dct_matrix(n=BLOCK):
+    """正交 DCT-II 变换矩阵，块变换为 C @ B @ C.T"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    C = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    C[0] /= np.sqrt(2.0)
+    return C.astype(np.float32)
+
+DCT_MATRIX = _dct_matrix()
+
+def _to_blocks(img):
+    """(H, W) -> (H/8, W/8, 8, 8)，尺寸需为 8 的倍数"""
+    h, w = img.shape
+    return img.reshape(h // BLOCK, BLOCK, w // BLOCK, BLOCK).swapaxes(1, 2)
+
+def _from_blocks(blocks):
+    nh, nw = blocks.shape[:2]
+    return blocks.swapaxes(1, 2).reshape(nh * BLOCK, nw * BLOCK)
 
+def block_dct(img):
+    """对所有 8x8 块同时做二维 DCT"""
+    return DCT_MATRIX @ _to_blocks(img.astype(np.float32)) @ DCT_MATRIX.T
+
+def block_idct(coeffs):
+    return _from_blocks(DCT_MATRIX.T @ coeffs @ DCT_MATRIX)
+
+def embed_watermark_dct(host, watermark, strength=None, iterations=4, quality=JPEG_QUALITY):
+    """分块 DCT 嵌入：水印缩放到 (H/8, W/8)，每块一位；不足 8 的边缘保持原样
+    strength 缺省为 jpeg_strength(quality)（质量 50 时约 67，test.png 上 PSNR 约 31dB）
+    接近 0/255 的块在取整截断后可能翻转比特，因此对结果重复嵌入 iterations 次"""
+    if strength is None:
+        strength = jpeg_strength(quality)
+    h, w = host.shape[0] // BLOCK * BLOCK, host.shape[1] // BLOCK * BLOCK
+    bits = cv2.resize(watermark, (w // BLOCK, h // BLOCK), interpolation=cv2.INTER_AREA) > 128
+    sign = np.where(bits, 1.0, -1.0).astype(np.float32)
+    (u1, v1), (u2, v2) = DCT_PAIR
+    
+    region = host[:h, :w]
+    for _ in range(iterations):
+        coeffs = block_dct(region)
+        c1, c2 = coeffs[:, :, u1, v1], coeffs[:, :, u2, v2]
+        if np.all(sign * (c1 - c2) >= strength / 2):
+            break
+        mean = (c1 + c2) / 2
+        diff = sign * np.maximum(sign * (c1 - c2), strength)
+        coeffs[:, :, u1, v1] = mean + diff / 2
+        coeffs[:, :, u2, v2] = mean - diff / 2
+        region = np.clip(np.rint(block_idct(coeffs)), 0, 255).astype(np.uint8)
+    
+    watermarked = host.copy()
+    watermarked[:h, :w] = region
+    return watermarked
+
+def extract_watermark_dct(watermarked, wm_shape=(128, 128)):
+    """分块 DCT 盲提取：只需要待检图像，输出缩放到 wm_shape=(H, W) 的 0/255 水印"""
+    h, w = watermarked.shape[0] // BLOCK * BLOCK, watermarked.shape[1] // BLOCK * BLOCK
+    coeffs = block_dct(watermarked[:h, :w])
+    (u1, v1), (u2, v2) = DCT_PAIR
+    bits = (coeffs[:, :, u1, v1] > coeffs[:, :, u2, v2]).astype(np.uint8) * 255
+    return cv2.resize(bits, (wm_shape[1], wm_shape[0]), interpolation=cv2.INTER_NEAREST)
+
+# 可选的嵌入/提取方法：dwt 为非盲（提取需原图），dct 为盲提取
+WATERMARK_METHODS = ("dwt", "dct")
+
+def extract_by_method(method, watermarked, original=None, wm_shape=(128, 128)):
+    if method == "dct":
+        return extract_watermark_dct(watermarked, wm_shape)
+    return extract_watermark(watermarked, original)
 
 def compute_nc(original_wm, extracted_wm):
-    """计算归一化相关系数"""
-    # 调整尺寸
-    h, w = original_wm.shape
-    extracted_resized = cv2.resize(extracted_wm, (w, h))
-    
-    # 归一化处理
-    orig_norm = original_wm.astype(np.float32) / 255.0
-    extr_norm = extracted_resized.astype(np.float32) / 255.0
-    
-    # 计算相关系数
-    numerator = np.sum(orig_norm * extr_norm)
-    denominator = np.sqrt(np.sum(orig_norm**2)) * np.sqrt(np.sum(extr_norm**2))
-    return numerator / denominator if denominator > 0 else 0
+    """计算归一化相关系数（提取结果自动缩放到原水印尺寸）"""
+    return nc(original_wm, extracted_wm)
 
 def apply_attacks(image):
     """应用各种攻击模拟"""
@@ -144,25 +241,23 @@ def apply_attacks(image):
     
     return attacks
 
-def evaluate_robustness(watermarked, original, watermark):
-    """评估水印鲁棒性"""
-    os.makedirs(RESULTS_DIR, exist_ok=True)
+def evaluate_robustness(watermarked, original, watermark, plot=True, method="dwt", sync=False):
+    """评估水印鲁棒性（攻击与提取结果都保留在内存中，plot=False 时不绘图）
+    sync=True 时先把全部受攻击图像一次性对齐回原图（wm_sync），再提取"""
     results = {}
+    extracted_images = {}
     
     # 应用攻击
     attacked_images = apply_attacks(watermarked)
-    index = 0
+    if sync:
+        aligned, _ = Synchronizer(original).align_batch(list(attacked_images.values()))
+        attacked_images = dict(zip(attacked_images, aligned))
     
     for attack_name, attacked_img in attacked_images.items():
         try:
-            # 保存攻击后图像
-            attack_path = f"{RESULTS_DIR}/{attack_name}.png"
-            cv2.imwrite(attack_path, attacked_img)
-            
             # 提取水印
-            extracted = extract_watermark(attacked_img, original)
-            extracted_path = f"{RESULTS_DIR}/{attack_name}_extracted.png"
-            cv2.imwrite(extracted_path, extracted)
+            extracted = extract_by_method(method, attacked_img, original, watermark.shape)
+            extracted_images[attack_name] = extracted
             
             # 计算NC值
             nc = compute_nc(watermark, extracted)
@@ -171,10 +266,14 @@ def evaluate_robustness(watermarked, original, watermark):
             print(f"{attack_name}攻击处理失败: {str(e)}")
             results[attack_name] = 0
     
+    if not plot:
+        return results
+    
     # 可视化结果
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    plt = _pyplot()
     plt.figure(figsize=(15, 10))
-    for i, (name, img) in enumerate(attacked_images.items(), 1):
-        extracted_img = cv2.imread(f"{RESULTS_DIR}/{name}_extracted.png", 0)
+    for i, (name, extracted_img) in enumerate(extracted_images.items(), 1):
         plt.subplot(3, 3, i)
         plt.imshow(extracted_img, cmap='gray')
         plt.title(f"{name}\nNC={results[name]:.4f}")
@@ -188,6 +287,8 @@ def evaluate_robustness(watermarked, original, watermark):
 
 def visualize_comparison(host, watermarked, watermark, extracted):
     """可视化水印效果"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    plt = _pyplot()
     plt.figure(figsize=(15, 10))
     
     # 原始与含水印图像对比
@@ -228,8 +329,8 @@ def visualize_comparison(host, watermarked, watermark, extracted):
     plt.savefig(f"{RESULTS_DIR}/comparison.png")
     plt.show()
 
-def main():
-    """主执行函数"""
+def main(method="dwt", sync=False):
+    """主执行函数，method 为 dwt 或 dct，sync 为 True 时鲁棒性测试前先做几何重同步"""
     # 准备宿主图像
     # 宿主图像处理（自动调整尺寸为偶数）
     host_img = cv2.imread(HOST_PATH, cv2.IMREAD_GRAYSCALE) if os.path.exists(HOST_PATH) else create_host_image()
@@ -239,7 +340,10 @@ def main():
     watermark_img = generate_watermark()
     
     # 嵌入水印（自动尺寸匹配）
-    watermarked_img = embed_watermark(host_img, watermark_img)
+    if method == "dct":
+        watermarked_img = embed_watermark_dct(host_img, watermark_img)
+    else:
+        watermarked_img = embed_watermark(host_img, watermark_img)
     watermarked_img = watermarked_img[:host_img.shape[0], :host_img.shape[1]]  # 确保同尺寸
     
     # 安全计算指标
@@ -248,7 +352,7 @@ def main():
     
     # 提取水印
     print("提取水印...")
-    extracted_wm = extract_watermark(watermarked_img, host_img)
+    extracted_wm = extract_by_method(method, watermarked_img, host_img, watermark_img.shape)
     
     # 评估提取质量
     nc = compute_nc(watermark_img, extracted_wm)
@@ -259,7 +363,7 @@ def main():
     
     # 鲁棒性测试
     print("鲁棒性测试...")
-    robustness = evaluate_robustness(watermarked_img, host_img, watermark_img)
+    robustness = evaluate_robustness(watermarked_img, host_img, watermark_img, method=method, sync=sync)
     
     # 打印测试结果
     print("\n鲁棒性测试结果:")
@@ -267,5 +371,10 @@ def main():
         print(f"{attack:<8}: {nc_value:.4f}")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="DWT / DCT 水印演示与鲁棒性测试")
+    parser.add_argument("method", nargs="?", choices=WATERMARK_METHODS, default="dwt")
+    parser.add_argument("--sync", action="store_true", help="鲁棒性测试前先做几何重同步")
+    args = parser.parse_args()
+    main(args.method, args.sync)
     print(f"处理完成! 结果保存在 {RESULTS_DIR} 目录")
\ No newline at end of file
@@ -0,0 +1,95 @@
+import os
+import json
+import itertools
+
+import cv2
+import numpy as np
+
+# ------------------------------
+# 水印库检索
+# ------------------------------
+# 库中每个水印保存两份去均值、单位范数的行向量：
+#   coarse.npy  (N, h*w)  低分辨率，用于一次矩阵乘法粗筛
+#   full.npy    (N, H*W)  全分辨率，只对粗筛出的候选重排
+# 两者均以内存映射方式打开；行向量已归一化，内积即 calcNCC 定义的归一化互相关
+
+FULL_SHAPE = (128, 128)
+COARSE_SHAPE = (32, 32)
+
+def _normalize_rows(x):
+    x = x.astype(np.float32, copy=False)
+    x = x - x.mean(axis=1, keepdims=True)
+    norm = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norm, 1e-12)
+
+def _flatten(img, shape):
+    """缩放到 shape=(H, W) 并拉平成一行"""
+    img = np.asarray(img, dtype=np.float32)
+    if img.ndim == 3:
+        img = img[:, :, 0]
+    return cv2.resize(img, (shape[1], shape[0]), interpolation=cv2.INTER_AREA).reshape(1, -1)
+
+class WatermarkBank:
+    def __init__(self, root):
+        """打开 build 生成的水印库目录"""
+        with open(os.path.join(root, "bank.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.ids = meta["ids"]
+        self.full_shape = tuple(meta["full_shape"])
+        self.coarse_shape = tuple(meta["coarse_shape"])
+        self.coarse = np.load(os.path.join(root, "coarse.npy"), mmap_mode="r")
+        self.full = np.load(os.path.join(root, "full.npy"), mmap_mode="r")
+
+    @classmethod
+    def build(cls, root, watermarks, n=None, full_shape=FULL_SHAPE, coarse_shape=COARSE_SHAPE, chunk=1024):
+        """watermarks 为 (id, 水印图像) 的序列或迭代器，n 为条目数（序列可省略，取 len）
+        每次只从 watermarks 取 chunk 个写入内存映射文件，常驻内存的只有 id 列表"""
+        if n is None:
+            n = len(watermarks)
+        os.makedirs(root, exist_ok=True)
+        coarse = np.lib.format.open_memmap(os.path.join(root, "coarse.npy"), mode="w+",
+                                           dtype=np.float32, shape=(n, coarse_shape[0] * coarse_shape[1]))
+        full = np.lib.format.open_memmap(os.path.join(root, "full.npy"), mode="w+",
+                                         dtype=np.float32, shape=(n, full_shape[0] * full_shape[1]))
+        it = iter(watermarks)
+        ids = []
+        for start in range(0, n, chunk):
+            items = list(itertools.islice(it, min(chunk, n - start)))
+            if not items:
+                break
+            stop = start + len(items)
+            ids.extend(str(i) for i, _ in items)
+            full[start:stop] = _normalize_rows(np.vstack([_flatten(wm, full_shape) for _, wm in items]))
+            coarse[start:stop] = _normalize_rows(np.vstack([_flatten(wm, coarse_shape) for _, wm in items]))
+            del items
+        extra = next(it, None) is not None
+        coarse.flush()
+        full.flush()
+        del coarse, full
+        if len(ids) != n or extra:
+            raise ValueError(f"水印条目数与 n={n} 不符")
+        with open(os.path.join(root, "bank.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "full_shape": list(full_shape), "coarse_shape": list(coarse_shape)}, f)
+        return cls(root)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search_batch(self, planes, top_k=5, rerank=10):
+        """对多张提取出的水印平面检索，返回每张的 [(id, NCC)]，按 NCC 降序
+        粗筛取 top_k*rerank 个候选，再用全分辨率 NCC 重排"""
+        q_coarse = _normalize_rows(np.vstack([_flatten(p, self.coarse_shape) for p in planes]))
+        q_full = _normalize_rows(np.vstack([_flatten(p, self.full_shape) for p in planes]))
+        scores = q_coarse @ self.coarse.T  # (Q, N)
+        k = min(max(top_k * rerank, top_k), len(self))
+        results = []
+        for qi in range(len(planes)):
+            cand = np.argpartition(-scores[qi], k - 1)[:k] if k < len(self) else np.arange(len(self))
+            cand = np.sort(cand)  # 顺序读取内存映射
+            fine = self.full[cand] @ q_full[qi]
+            order = np.argsort(-fine)[:top_k]
+            results.append([(self.ids[cand[i]], float(fine[i])) for i in order])
+        return results
+
+    def search(self, plane, top_k=5, rerank=10):
+        return self.search_batch([plane], top_k, rerank)[0]
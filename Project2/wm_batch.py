@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from wm import renderTextBitmap, embedBitmapLSB
+
+# ------------------------------
+# 批量 LSB 水印
+# ------------------------------
+# 文件按块分给进程池；每个进程内部为 解码线程 -> 有界队列 -> 嵌入 -> 有界队列 -> 编码线程 的流水线
+# 输出统一为 PNG（LSB 不能经受有损压缩），已存在的输出直接跳过，中断后重新运行即可续跑
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+def listJobs(inputDir, outputDir):
+    """返回 [(输入路径, 输出路径)]、已存在输出而跳过的数量，以及输出名冲突的 [(输入路径, 原因)]
+    同目录下 a.png 与 a.jpg 都会输出为 a.png，只处理排序在前的一个，其余记为失败"""
+    jobs, skipped, collisions = [], 0, []
+    claimed = {}
+    for root, _, files in os.walk(inputDir):
+        for name in sorted(files):
+            if not name.lower().endswith(IMAGE_EXTS):
+                continue
+            src = os.path.join(root, name)
+            rel = os.path.relpath(src, inputDir)
+            dst = os.path.join(outputDir, os.path.splitext(rel)[0] + ".png")
+            if dst in claimed:
+                collisions.append((src, f"输出 {dst} 与 {claimed[dst]} 冲突"))
+                continue
+            claimed[dst] = src
+            if os.path.exists(dst):
+                skipped += 1
+            else:
+                jobs.append((src, dst))
+    return jobs, skipped, collisions
+
+def _decode(jobs, q):
+    for src, dst in jobs:
+        try:
+            q.put((src, dst, np.array(Image.open(src).convert("RGB")), None))
+        except Exception as e:
+            q.put((src, dst, None, e))
+    q.put(None)
+
+def _encode(q, failures, done):
+    while True:
+        item = q.get()
+        if item is None:
+            return
+        src, dst, data = item
+        try:
+            os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+            tmp = dst + ".part"
+            Image.fromarray(data).save(tmp, format="PNG")
+            os.replace(tmp, dst)
+            done[0] += 1
+        except Exception as e:
+            failures.append((src, repr(e)))
+
+def _processChunk(jobs, text, fontSize, fontPath, queueSize):
+    """在单个工作进程中处理一批文件，返回 (成功数, 失败列表)"""
+    bitmap, origin = renderTextBitmap(text, fontSize, fontPath=fontPath)
+    decoded, encoded = queue.Queue(queueSize), queue.Queue(queueSize)
+    failures, done = [], [0]
+    reader = threading.Thread(target=_decode, args=(jobs, decoded), daemon=True)
+    writer = threading.Thread(target=_encode, args=(encoded, failures, done), daemon=True)
+    reader.start()
+    writer.start()
+    while True:
+        item = decoded.get()
+        if item is None:
+            break
+        src, dst, data, err = item
+        if err is not None:
+            failures.append((src, repr(err)))
+            continue
+        embedBitmapLSB(data, bitmap, origin, out=data)
+        encoded.put((src, dst, data))
+    encoded.put(None)
+    writer.join()
+    return done[0], failures
+
+def watermarkDirectory(inputDir, outputDir, text, fontSize=50, fontPath="arial.ttf",
+                       workers=None, chunkSize=64, queueSize=8):
+    """对目录下所有图片嵌入同一文字水印，返回吞吐与失败统计"""
+    start = time.perf_counter()
+    jobs, skipped, collisions = listJobs(inputDir, outputDir)
+    chunks = [jobs[i:i + chunkSize] for i in range(0, len(jobs), chunkSize)]
+    processed, failures = 0, list(collisions)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_processChunk, c, text, fontSize, fontPath, queueSize) for c in chunks]
+        for chunk, fut in zip(chunks, futures):
+            try:
+                n, failed = fut.result()
+            except Exception as e:
+                n, failed = 0, [(src, repr(e)) for src, _ in chunk]
+            processed += n
+            failures.extend(failed)
+    elapsed = time.perf_counter() - start
+    return {
+        "total": len(jobs) + skipped + len(collisions),
+        "processed": processed,
+        "skipped": skipped,
+        "failed": len(failures),
+        "failures": failures,
+        "seconds": elapsed,
+        "imagesPerSec": processed / elapsed if elapsed > 0 else 0.0,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量 LSB 文字水印")
+    parser.add_argument("inputDir")
+    parser.add_argument("outputDir")
+    parser.add_argument("--text", default="test watermark")
+    parser.add_argument("--font-size", type=int, default=50)
+    parser.add_argument("--font", default="arial.ttf")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    args = parser.parse_args()
+
+    stats = watermarkDirectory(args.inputDir, args.outputDir, args.text, args.font_size,
+                               args.font, args.workers, args.chunk_size)
+    for src, err in stats["failures"]:
+        print(f"失败: {src}: {err}", file=sys.stderr)
+    print(f"共 {stats['total']} 张, 处理 {stats['processed']}, 跳过 {stats['skipped']}, "
+          f"失败 {stats['failed']}, 用时 {stats['seconds']:.2f}s ({stats['imagesPerSec']:.1f} 张/秒)")
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pywt
+
+from wm_DCT import prepare_watermark
+
+# ------------------------------
+# 多级小波 + 彩色图像水印
+# ------------------------------
+# 彩色图像转到 YCrCb，只在亮度通道 Y 的第 level 级近似系数 cA 中嵌入：
+#   cA' = cA + alpha * wm * max(cA)
+# 亮度按行切成高度为 2^level 整数倍的条带，各条带的分解/重构在线程池中并行；
+# 使用 periodization 边界模式，haar 下分条结果与整幅变换完全一致（其他小波在条带边界略有差异，
+# 嵌入与提取须使用相同的 tile_rows）。
+# DWTWorkspace 按尺寸缓存 YCrCb、亮度缓冲区与二值化水印，批量处理同尺寸图像时不再重复分配。
+
+MODE = "periodization"
+
+class DWTWorkspace:
+    def __init__(self, wavelet="haar", level=2, tile_rows=512, workers=None):
+        self.wavelet, self.level = wavelet, level
+        step = 1 << level
+        self.tile_rows = max(tile_rows // step, 1) * step
+        self.workers = workers
+        self._buffers = {}
+        self._wm_cache = (None, None, None)
+
+    def _buffer(self, name, shape, dtype):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._buffers[name] = np.empty(shape, dtype=dtype)
+        return buf
+
+    def _prepared(self, watermark, shape):
+        """同一水印对象、同一尺寸只缩放二值化一次"""
+        src, cached_shape, prepared = self._wm_cache
+        if src is not watermark or cached_shape != shape:
+            prepared = prepare_watermark(watermark, shape)
+            self._wm_cache = (watermark, shape, prepared)
+        return prepared
+
+    def _crop(self, shape):
+        step = 1 << self.level
+        return shape[0] // step * step, shape[1] // step * step
+
+    def _strips(self, h):
+        return [(y, min(y + self.tile_rows, h)) for y in range(0, h, self.tile_rows)]
+
+    def _luma(self, img, name):
+        """BGR -> YCrCb（写入复用的缓冲区），返回 (ycc, 裁剪后的 float32 亮度)"""
+        ycc = cv2.cvtColor(img, cv2.COLOR_BGR2YCrCb, dst=self._buffer(name + "_ycc", img.shape, np.uint8))
+        h, w = self._crop(img.shape)
+        y = self._buffer(name + "_y", (h, w), np.float32)
+        np.copyto(y, ycc[:h, :w, 0], casting="unsafe")
+        return ycc, y
+
+    def _decompose(self, pool, y):
+        return list(pool.map(lambda s: pywt.wavedec2(y[s[0]:s[1]], self.wavelet, mode=MODE, level=self.level),
+                             self._strips(y.shape[0])))
+
+    def embed(self, host, watermark, alpha=0.1):
+        """在彩色（BGR）图像中嵌入水印，返回新的 BGR 图像"""
+        ycc, y = self._luma(host, "host")
+        wm_binary = self._prepared(watermark, (y.shape[0] >> self.level, y.shape[1] >> self.level))
+        strips = self._strips(y.shape[0])
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            coeffs = self._decompose(pool, y)
+            scale = alpha * max(float(np.max(c[0])) for c in coeffs)
+
+            def reconstruct(i):
+                y0, y1 = strips[i]
+                c = coeffs[i]
+                c[0] += scale * wm_binary[y0 >> self.level:y1 >> self.level]
+                y[y0:y1] = pywt.waverec2(c, self.wavelet, mode=MODE)
+
+            list(pool.map(reconstruct, range(len(strips))))
+        np.clip(y, 0, 255, out=y)
+        ycc[:y.shape[0], :y.shape[1], 0] = y.astype(np.uint8)
+        return cv2.cvtColor(ycc, cv2.COLOR_YCrCb2BGR)
+
+    def extract(self, watermarked, original, alpha=0.1):
+        """非盲提取：两幅图像亮度的近似系数之差，返回 0/255 水印（尺寸为 cA 尺寸）"""
+        _, y_wm = self._luma(watermarked, "wm")
+        _, y_orig = self._luma(original, "orig")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            c_wm = self._decompose(pool, y_wm)
+            c_orig = self._decompose(pool, y_orig)
+        cA_wm = np.vstack([c[0] for c in c_wm])
+        cA_orig = np.vstack([c[0] for c in c_orig])
+        extracted = (cA_wm - cA_orig) / (alpha * np.max(cA_orig))
+        return (np.clip(extracted, 0, 1) * 255).astype(np.uint8)
+
+def embed_watermark_color(host, watermark, alpha=0.1, wavelet="haar", level=2, workers=None):
+    return DWTWorkspace(wavelet, level, workers=workers).embed(host, watermark, alpha)
+
+def extract_watermark_color(watermarked, original, alpha=0.1, wavelet="haar", level=2, workers=None):
+    return DWTWorkspace(wavelet, level, workers=workers).extract(watermarked, original, alpha)
@@ -0,0 +1,257 @@
+import os
+import csv
+import json
+import math
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from wm_metrics import psnr, ssim
+from wm_sync import Synchronizer
+from wm import renderTextBitmap, embedBitmapLSB, calcNCC
+from wm_DCT import (generate_watermark, embed_watermark, extract_watermark, compute_nc,
+                    embed_watermark_dct, extract_watermark_dct, JPEG_QUALITY)
+
+# ------------------------------
+# 攻击矩阵评估
+# ------------------------------
+# (图像 × 方案 × 攻击 × 参数) 全部在内存中完成，不落盘；
+# 每个 (图像, 方案) 只嵌入一次，攻击与提取交给线程池（OpenCV/NumPy 运算会释放 GIL）
+# sync=True 时提取前先用 wm_sync 把受攻击图像对齐回宿主图像（每个宿主的频谱只算一次）
+
+def _affine(img, M):
+    h, w = img.shape[:2]
+    return cv2.warpAffine(img, M, (w, h))
+
+def attack_flip(img, axis):
+    return cv2.flip(img, 1 if axis == "h" else 0)
+
+def attack_rotate(img, angle):
+    h, w = img.shape[:2]
+    return _affine(img, cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1))
+
+def attack_translate(img, px):
+    return _affine(img, np.float32([[1, 0, px], [0, 1, px]]))
+
+def attack_crop(img, frac):
+    h, w = img.shape[:2]
+    dy, dx = int(h * frac), int(w * frac)
+    return cv2.resize(img[dy:h - dy, dx:w - dx], (w, h))
+
+def attack_scale(img, factor):
+    h, w = img.shape[:2]
+    return cv2.resize(cv2.resize(img, (int(w * factor), int(h * factor))), (w, h))
+
+def attack_contrast(img, factor):
+    return np.clip(img.astype(np.float32) * factor, 0, 255).astype(np.uint8)
+
+def attack_brightness(img, offset):
+    return np.clip(img.astype(np.float32) + offset, 0, 255).astype(np.uint8)
+
+def attack_noise(img, prob, seed=0):
+    rng = np.random.default_rng(seed)
+    r = rng.random(img.shape[:2])
+    out = img.copy()
+    out[r < prob / 2] = 0
+    out[r > 1 - prob / 2] = 255
+    return out
+
+def attack_blur(img, ksize):
+    return cv2.GaussianBlur(img, (ksize, ksize), 0)
+
+def attack_jpeg(img, quality):
+    _, enc = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    return cv2.imdecode(enc, cv2.IMREAD_UNCHANGED)
+
+ATTACKS = {
+    "flip": attack_flip,
+    "rotate": attack_rotate,
+    "translate": attack_translate,
+    "crop": attack_crop,
+    "scale": attack_scale,
+    "contrast": attack_contrast,
+    "brightness": attack_brightness,
+    "noise": attack_noise,
+    "blur": attack_blur,
+    "jpeg": attack_jpeg,
+}
+
+DEFAULT_GRID = {
+    "flip": ["h", "v"],
+    "rotate": [5, 15],
+    "translate": [20, 30],
+    "crop": [0.05, 0.1],
+    "scale": [0.8, 0.5],
+    "contrast": [1.2, 1.5],
+    "brightness": [50],
+    "noise": [0.05],
+    "blur": [5],
+    "jpeg": [90, 50],
+}
+
+# ------------------------------
+# 水印方案：embed(host) -> (含水印图像, 上下文)，extract(attacked, 上下文) -> 水印，score(上下文, 水印) -> NC
+# ------------------------------
+
+class LSBScheme:
+    name = "lsb"
+
+    def __init__(self, text="test watermark", fontSize=50):
+        self.text, self.fontSize = text, fontSize
+
+    def embed(self, host):
+        if host.ndim == 2:
+            host = cv2.cvtColor(host, cv2.COLOR_GRAY2BGR)
+        bitmap, origin = renderTextBitmap(self.text, self.fontSize)
+        reference = embedBitmapLSB(np.zeros(host.shape[:2] + (1,), np.uint8), bitmap, origin)[:, :, 0] * 255
+        return embedBitmapLSB(host, bitmap, origin), {"host": host, "reference": reference}
+
+    def extract(self, attacked, ctx):
+        return (attacked[:, :, 0] & 1) * 255
+
+    def score(self, ctx, extracted):
+        return float(calcNCC(ctx["reference"], extracted))
+
+class DWTScheme:
+    name = "dwt"
+
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.watermark = generate_watermark()
+
+    def embed(self, host):
+        if host.ndim == 3:
+            host = cv2.cvtColor(host, cv2.COLOR_BGR2GRAY)
+        host = host[:host.shape[0] // 2 * 2, :host.shape[1] // 2 * 2]
+        return embed_watermark(host, self.watermark, self.alpha), {"host": host}
+
+    def extract(self, attacked, ctx):
+        return extract_watermark(attacked, ctx["host"], self.alpha)
+
+    def score(self, ctx, extracted):
+        return float(compute_nc(self.watermark, extracted))
+
+class DCTScheme(DWTScheme):
+    name = "dct"
+
+    def __init__(self, strength=None, quality=JPEG_QUALITY):
+        self.strength, self.quality = strength, quality
+        self.watermark = generate_watermark()
+
+    def embed(self, host):
+        if host.ndim == 3:
+            host = cv2.cvtColor(host, cv2.COLOR_BGR2GRAY)
+        return embed_watermark_dct(host, self.watermark, self.strength, quality=self.quality), {"host": host}
+
+    def extract(self, attacked, ctx):
+        return extract_watermark_dct(attacked, self.watermark.shape)
+
+SCHEMES = {"lsb": LSBScheme, "dwt": DWTScheme, "dct": DCTScheme}
+
+def _run_cell(scheme, image_name, marked, ctx, attack, param):
+    attacked = ATTACKS[attack](marked, param)
+    aligned = attacked
+    if "sync" in ctx:
+        aligned, _ = ctx["sync"].align(attacked, interpolation=cv2.INTER_NEAREST if scheme.name == "lsb"
+                                       else cv2.INTER_LINEAR)
+    extracted = scheme.extract(aligned, ctx)
+    return {
+        "image": image_name,
+        "scheme": scheme.name,
+        "attack": attack,
+        "param": param,
+        "nc": scheme.score(ctx, extracted),
+        "psnr_attack": psnr(marked, attacked),
+        "ssim_attack": ssim(marked, attacked),
+    }, extracted
+
+def run_attack_matrix(images, schemes=None, grid=None, workers=None, keep_extracted=False, sync=False):
+    """images 为 {名称: 图像数组}；返回结果行列表（keep_extracted 时每行附带提取出的水印）"""
+    schemes = schemes if schemes is not None else [cls() for cls in SCHEMES.values()]
+    grid = grid if grid is not None else DEFAULT_GRID
+    rows = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        embedded = [(image_name, scheme, pool.submit(scheme.embed, host))
+                    for image_name, host in images.items() for scheme in schemes]
+        futures = []
+        for image_name, scheme, fut in embedded:
+            marked, ctx = fut.result()
+            if sync:
+                ctx["sync"] = Synchronizer(ctx["host"])
+            quality = {"psnr_embed": psnr(ctx["host"], marked), "ssim_embed": ssim(ctx["host"], marked)}
+            for attack, params in grid.items():
+                for param in params:
+                    futures.append((quality, pool.submit(_run_cell, scheme, image_name, marked, ctx, attack, param)))
+        for quality, fut in futures:
+            row, extracted = fut.result()
+            row.update(quality)
+            if keep_extracted:
+                row["extracted"] = extracted
+            rows.append(row)
+    return rows
+
+# ------------------------------
+# 输出
+# ------------------------------
+
+FIELDS = ["image", "scheme", "attack", "param", "nc", "psnr_embed", "ssim_embed", "psnr_attack", "ssim_attack"]
+
+def write_csv(rows, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+def _json_value(v):
+    """inf / nan（如图像完全相同时的 PSNR）不是合法 JSON，写为 null"""
+    return None if isinstance(v, float) and not math.isfinite(v) else v
+
+def write_json(rows, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{k: _json_value(r[k]) for k in FIELDS} for r in rows], f,
+                  ensure_ascii=False, indent=2, allow_nan=False)
+
+def plot_matrix(rows, path):
+    """可选：把带 extracted 的结果画成网格并保存，不弹窗"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rows = [r for r in rows if "extracted" in r]
+    cols = 6
+    n_rows = max((len(rows) + cols - 1) // cols, 1)
+    fig = plt.figure(figsize=(cols * 2.5, n_rows * 2.5))
+    for i, r in enumerate(rows, 1):
+        ax = fig.add_subplot(n_rows, cols, i)
+        ax.imshow(r["extracted"], cmap="gray")
+        ax.set_title(f"{r['scheme']} {r['attack']}={r['param']}\nNC={r['nc']:.3f}", fontsize=8)
+        ax.axis("off")
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="水印攻击矩阵评估")
+    parser.add_argument("images", nargs="+")
+    parser.add_argument("--schemes", default=",".join(SCHEMES))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--csv", default=None)
+    parser.add_argument("--json", default=None)
+    parser.add_argument("--plot", default=None, help="保存结果网格图的路径")
+    parser.add_argument("--sync", action="store_true", help="提取前做 FFT 几何重同步")
+    args = parser.parse_args()
+
+    images = {os.path.basename(p): cv2.imread(p, cv2.IMREAD_COLOR) for p in args.images}
+    schemes = [SCHEMES[s]() for s in args.schemes.split(",")]
+    rows = run_attack_matrix(images, schemes, workers=args.workers, keep_extracted=bool(args.plot), sync=args.sync)
+    for r in rows:
+        print(f"{r['image']:<16} {r['scheme']:<4} {r['attack']:<10} {str(r['param']):<6} "
+              f"NC={r['nc']:.4f} PSNR={r['psnr_attack']:.2f} SSIM={r['ssim_attack']:.4f}")
+    if args.csv:
+        write_csv(rows, args.csv)
+    if args.json:
+        write_json(rows, args.json)
+    if args.plot:
+        plot_matrix(rows, args.plot)
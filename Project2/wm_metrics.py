@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+
+# ------------------------------
+# 批量质量指标
+# ------------------------------
+# 输入为 (N, H, W) 或 (N, H, W, C) 的堆叠数组，单张图像使用末尾的 psnr / nc / ncc / ssim。
+# 逐块（按行分块，每块 tile_rows 行）转换为 float32 计算，块间用 float64 累加，
+# 不会产生整幅 float64 临时数组，也不会出现 uint8 相减回绕的问题。
+
+TILE_ROWS = 512
+SSIM_K1, SSIM_K2 = 0.01, 0.03
+SSIM_SIGMA = 1.5
+SSIM_WIN = 11
+_HALO = SSIM_WIN // 2
+
+def _one(x):
+    """单张图像 -> 批量大小为 1 的数组"""
+    return np.asarray(x)[None]
+
+def _match(test, shape):
+    """把 test 中的每张图缩放到 shape=(H, W)（尺寸一致时不复制）"""
+    if test.shape[1:3] == tuple(shape):
+        return test
+    return np.stack([cv2.resize(t, (shape[1], shape[0])) for t in test])
+
+def _tiles(n_rows, tile_rows):
+    for y in range(0, n_rows, tile_rows):
+        yield y, min(y + tile_rows, n_rows)
+
+def psnr_batch(ref, test, data_range=255.0, tile_rows=TILE_ROWS):
+    """逐张计算 PSNR，返回 (N,) 数组；完全相同时为 inf"""
+    ref, test = np.asarray(ref), np.asarray(test)
+    test = _match(test, ref.shape[1:3])
+    sse = np.zeros(len(ref), dtype=np.float64)
+    for y0, y1 in _tiles(ref.shape[1], tile_rows):
+        d = ref[:, y0:y1].astype(np.float32) - test[:, y0:y1].astype(np.float32)
+        sse += np.sum((d * d).reshape(len(ref), -1), axis=1, dtype=np.float64)
+    mse = sse / (ref[0].size if len(ref) else 1)
+    with np.errstate(divide="ignore"):
+        return np.where(mse > 0, 10 * np.log10(data_range ** 2 / np.maximum(mse, 1e-300)), np.inf)
+
+def nc_batch(ref, test, centered=False, tile_rows=TILE_ROWS):
+    """归一化相关：centered=False 为 compute_nc 的余弦形式，True 为 calcNCC 的去均值形式"""
+    ref, test = np.asarray(ref), np.asarray(test)
+    test = _match(test, ref.shape[1:3])
+    n = len(ref)
+    sa, sb, saa, sbb, sab = (np.zeros(n, dtype=np.float64) for _ in range(5))
+    for y0, y1 in _tiles(ref.shape[1], tile_rows):
+        a = ref[:, y0:y1].astype(np.float32).reshape(n, -1)
+        b = test[:, y0:y1].astype(np.float32).reshape(n, -1)
+        sa += a.sum(axis=1, dtype=np.float64)
+        sb += b.sum(axis=1, dtype=np.float64)
+        saa += np.einsum("ij,ij->i", a, a, dtype=np.float64)
+        sbb += np.einsum("ij,ij->i", b, b, dtype=np.float64)
+        sab += np.einsum("ij,ij->i", a, b, dtype=np.float64)
+    if centered:
+        m = ref[0].size
+        sab, saa, sbb = sab - sa * sb / m, saa - sa * sa / m, sbb - sb * sb / m
+    denom = np.sqrt(np.maximum(saa, 0) * np.maximum(sbb, 0))
+    return np.where(denom > 0, sab / np.where(denom > 0, denom, 1), 0.0)
+
+def _ssim_tile(a, b, data_range):
+    c1, c2 = (SSIM_K1 * data_range) ** 2, (SSIM_K2 * data_range) ** 2
+    blur = lambda x: cv2.GaussianBlur(x, (SSIM_WIN, SSIM_WIN), SSIM_SIGMA)
+    mu_a, mu_b = blur(a), blur(b)
+    var_a = blur(a * a) - mu_a * mu_a
+    var_b = blur(b * b) - mu_b * mu_b
+    cov = blur(a * b) - mu_a * mu_b
+    return ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+
+def ssim_batch(ref, test, data_range=255.0, tile_rows=TILE_ROWS):
+    """高斯窗 (11x11, sigma=1.5) 的平均 SSIM；多通道时对各通道取平均
+    分块时每块上下各多取 5 行作为窗口边界，结果与整幅计算一致"""
+    ref, test = np.asarray(ref), np.asarray(test)
+    test = _match(test, ref.shape[1:3])
+    h = ref.shape[1]
+    total = np.zeros(len(ref), dtype=np.float64)
+    for i in range(len(ref)):
+        for y0, y1 in _tiles(h, tile_rows):
+            h0, h1 = max(y0 - _HALO, 0), min(y1 + _HALO, h)
+            a = ref[i, h0:h1].astype(np.float32)
+            b = test[i, h0:h1].astype(np.float32)
+            s = _ssim_tile(a, b, data_range)[y0 - h0:y0 - h0 + (y1 - y0)]
+            total[i] += s.sum(dtype=np.float64)
+    return total / ref[0].size
+
+# ------------------------------
+# 单张接口
+# ------------------------------
+
+def psnr(ref, test, data_range=255.0):
+    return float(psnr_batch(_one(ref), _one(test), data_range)[0])
+
+def nc(ref, test):
+    return float(nc_batch(_one(ref), _one(test))[0])
+
+def ncc(ref, test):
+    return float(nc_batch(_one(ref), _one(test), centered=True)[0])
+
+def ssim(ref, test, data_range=255.0):
+    return float(ssim_batch(_one(ref), _one(test), data_range)[0])
@@ -0,0 +1,72 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+import pywt
+
+from wm_DCT import embed_watermark, extract_watermark_ll
+
+# ------------------------------
+# 宿主 LL 子带参考库
+# ------------------------------
+# 非盲 DWT 提取只用到宿主图像的 LL 子带和 np.max(LL)。嵌入时把它们按宿主内容哈希保存：
+#   <root>/<key>.npy   LL 子带，float16，以内存映射方式读取（像素数为原图 1/4）
+#   <root>/<key>.json  形状与 LL 最大值（float64）
+# 验证时只读取这一子带，不再需要原图，也省去对原图的解码和一次小波分解
+
+def content_key(host):
+    """宿主图像的内容哈希（包含形状与数据类型）"""
+    h = hashlib.sha256()
+    h.update(f"{host.shape}|{host.dtype}".encode())
+    h.update(np.ascontiguousarray(host).tobytes())
+    return h.hexdigest()
+
+class ReferenceStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, key):
+        base = os.path.join(self.root, key)
+        return base + ".npy", base + ".json"
+
+    def __contains__(self, key):
+        return os.path.exists(self._paths(key)[1])
+
+    def put_ll(self, key, LL):
+        """保存 LL 子带；已存在时直接返回"""
+        npy_path, meta_path = self._paths(key)
+        if key in self:
+            return key
+        arr = np.lib.format.open_memmap(npy_path, mode="w+", dtype=np.float16, shape=LL.shape)
+        arr[:] = LL
+        arr.flush()
+        del arr
+        # 元数据最后写入，作为该条目完整可用的标志
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"shape": list(LL.shape), "ll_max": float(np.max(LL))}, f)
+        return key
+
+    def put(self, host):
+        """对宿主图像做一次小波分解并保存 LL，返回键"""
+        LL, _ = pywt.dwt2(host, 'haar')
+        return self.put_ll(content_key(host), LL)
+
+    def get(self, key):
+        """返回 (LL 内存映射, LL 最大值)"""
+        npy_path, meta_path = self._paths(key)
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        return np.load(npy_path, mmap_mode="r"), meta["ll_max"]
+
+def embed_and_store(host, watermark, store, alpha=0.1):
+    """嵌入水印并保存参考子带，两者共用同一次小波分解；返回 (含水印图像, 键)"""
+    coeffs = pywt.dwt2(host, 'haar')
+    key = store.put_ll(content_key(host), coeffs[0])
+    return embed_watermark(host, watermark, alpha, coeffs=coeffs), key
+
+def extract_watermark_stored(watermarked, key, store, alpha=0.1):
+    """只依赖参考库提取水印，结果与 extract_watermark(watermarked, original) 一致（LL 精度为 float16）"""
+    LL_orig, LL_max = store.get(key)
+    return extract_watermark_ll(watermarked, LL_orig.astype(np.float32), LL_max, alpha)
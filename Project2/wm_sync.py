@@ -0,0 +1,211 @@
+import cv2
+import numpy as np
+
+# ------------------------------
+# 几何重同步（Fourier-Mellin）
+# ------------------------------
+# 提取前把受攻击图像对齐回参考图像（原图或含水印图像），全部基于 FFT，复杂度 O(N log N)：
+#   1. 加窗幅度谱与平移无关；高通后做对数极坐标变换，旋转 / 缩放变为平移，相位相关求出角度与尺度
+#   2. 幅度谱中心对称，角度有 θ 与 θ+180° 两个候选；翻转候选（无 / 水平 / 垂直）直接翻转幅度谱得到，
+#      各候选撤销后与参考图像相位相关，取相关峰最高者
+#   3. 撤销粗估计后再估计一次残余旋转 / 缩放；以上都在长边 work_size 的缩小图上完成
+#   4. 原尺寸上相位相关求平移；翻转、旋转缩放、平移合成一个仿射矩阵，只对原始输入插值一次
+# 同一参考图像的频谱只算一次；多张图像（及所有候选）堆叠成 (N, H, W) 后一次 FFT。
+# 整数平移与翻转可以逐像素还原，LSB 也能恢复；旋转 / 缩放需插值，只对 DWT 等变换域方案有效。
+
+FLIPS = ("none", "h", "v")
+LP_ANGLES = 720  # 对数极坐标图的角度采样数（0.5°）
+REFINE = 1
+# 估计值离 0° / 1 倍 / 整数像素足够近时取整，纯翻转与整数平移可以逐像素还原（LSB 需要）
+SNAP_ANGLE, SNAP_SCALE, SNAP_SHIFT = 0.1, 0.002, 0.1
+_EPS = 1e-9
+
+def _gray(img):
+    img = np.asarray(img)
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img.astype(np.float32)
+
+def _highpass(shape):
+    """对数极坐标前抑制低频（Reddy & Chatterji），使幅度谱中的旋转结构更突出"""
+    fy = np.cos(np.pi * np.linspace(-0.5, 0.5, shape[0], dtype=np.float32))
+    fx = np.cos(np.pi * np.linspace(-0.5, 0.5, shape[1], dtype=np.float32))
+    x = np.outer(fy, fx)
+    return (1 - x) * (2 - x)
+
+def phase_correlate_batch(ref_rfft, rffts, shape):
+    """ref_rfft 为参考图像的 rfft2 结果，rffts 为 (N, ...) 的待测 rfft2 结果，shape 为做 rfft2 时的（补零后）尺寸
+    返回 (N, 2) 的亚像素平移 (dx, dy)（待测图像相对参考的位移）与 (N,) 的相关峰值"""
+    cross = np.conj(ref_rfft) * rffts
+    cross /= np.abs(cross) + _EPS
+    corr = np.fft.irfft2(cross, s=shape)
+    n, (h, w) = len(corr), shape
+    flat = corr.reshape(n, -1).argmax(axis=1)
+    py, px = np.divmod(flat, w)
+    # 3x3 邻域加权质心做亚像素细化（循环边界）
+    oy, ox = np.mgrid[-1:2, -1:2]
+    idx = np.arange(n)[:, None, None]
+    patch = np.maximum(corr[idx, (py[:, None, None] + oy) % h, (px[:, None, None] + ox) % w], 0)
+    total = patch.sum(axis=(1, 2)) + _EPS
+    dy = py + (patch * oy).sum(axis=(1, 2)) / total
+    dx = px + (patch * ox).sum(axis=(1, 2)) / total
+    dy = (dy + h / 2) % h - h / 2
+    dx = (dx + w / 2) % w - w / 2
+    return np.stack([dx, dy], axis=1), corr[np.arange(n), py, px]
+
+def _dft_shape(shape):
+    """补零到 FFT 友好的尺寸（如 871 = 13 * 67 补到 875）"""
+    return tuple(cv2.getOptimalDFTSize(n) for n in shape)
+
+def _flip_matrix(flip, shape):
+    h, w = shape
+    if flip == "h":
+        return np.array([[-1, 0, w - 1], [0, 1, 0], [0, 0, 1]], dtype=np.float64)
+    if flip == "v":
+        return np.array([[1, 0, 0], [0, -1, h - 1], [0, 0, 1]], dtype=np.float64)
+    return np.eye(3)
+
+def _flip_spectrum(mags, flip):
+    """翻转图像的幅度谱 = 幅度谱沿同一轴取负频率（fftshift 后偶数长度需再循环移一位）"""
+    if flip == "none":
+        return mags
+    axis = 2 if flip == "h" else 1
+    return np.roll(np.flip(mags, axis=axis), 1 - mags.shape[axis] % 2, axis=axis)
+
+class Synchronizer:
+    def __init__(self, reference, flips=FLIPS, work_size=256):
+        """reference 为对齐目标（灰度或 BGR），其频谱只计算一次
+        旋转 / 缩放估计与候选选择在长边不超过 work_size 的缩小图上进行，平移在原尺寸上求出"""
+        ref = _gray(reference)
+        self.shape = ref.shape
+        self.flips = tuple(flips)
+        factor = min(1.0, work_size / max(self.shape))
+        self.work_shape = (round(self.shape[0] * factor), round(self.shape[1] * factor))
+        self.window = cv2.createHanningWindow(self.shape[::-1], cv2.CV_32F)
+        self.work_window = cv2.createHanningWindow(self.work_shape[::-1], cv2.CV_32F)
+        self.dft_shape, self.work_dft_shape = _dft_shape(self.shape), _dft_shape(self.work_shape)
+        # 幅度谱补零成正方形，两个方向的频率分辨率相同，图像旋转对应频谱的同角度旋转
+        n = cv2.getOptimalDFTSize(max(self.work_shape))
+        self.spectrum_shape = (n, n)
+        self.highpass = _highpass(self.spectrum_shape)
+        self.max_radius = n / 2
+        self.lp_shape = (LP_ANGLES, int(2 ** np.ceil(np.log2(self.max_radius))))
+
+        small = self._shrink(ref)[None]
+        self.ref_rfft = np.fft.rfft2(ref * self.window, s=self.dft_shape)
+        self.ref_work_rfft = np.fft.rfft2(small * self.work_window, s=self.work_dft_shape)[0]
+        self.ref_lp_rfft = np.fft.rfft2(self._log_polar(self._spectra(small)))[0]
+
+    def _shrink(self, gray):
+        if gray.shape == self.work_shape:
+            return gray
+        return cv2.resize(gray, self.work_shape[::-1], interpolation=cv2.INTER_AREA)
+
+    def _spectra(self, smalls):
+        """(N, h, w) -> 加窗、补零、中心化、高通后的幅度谱"""
+        ffts = np.fft.fftshift(np.fft.fft2(smalls * self.work_window, s=self.spectrum_shape), axes=(1, 2))
+        return np.abs(ffts) * self.highpass
+
+    def _log_polar(self, mags):
+        """(N, n, n) 幅度谱 -> (N, LP_ANGLES, lp_width) 对数极坐标图"""
+        c = self.max_radius
+        return np.stack([cv2.warpPolar(np.ascontiguousarray(m, dtype=np.float32), self.lp_shape[::-1],
+                                       (c, c), self.max_radius,
+                                       cv2.INTER_LINEAR | cv2.WARP_POLAR_LOG) for m in mags])
+
+    def _similarity(self, angle, scale):
+        """撤销旋转 angle（度，逆时针）与缩放 scale 的 3x3 矩阵（以原图中心为原点）"""
+        h, w = self.shape
+        return np.vstack([cv2.getRotationMatrix2D((w / 2, h / 2), -angle, 1 / scale), [0, 0, 1]])
+
+    def _warp_small(self, gray, m):
+        h, w = self.shape
+        return self._shrink(cv2.warpAffine(gray, m[:2], (w, h)))
+
+    def _rotation_scale(self, smalls, flips):
+        """缩小图（按 flips 翻转幅度谱）相对参考的旋转角与缩放，按 [flips[0] 的全部图像, flips[1] ...] 排列
+        每张图只做一次 FFT，翻转候选直接翻转幅度谱"""
+        mags = self._spectra(smalls)
+        lp = np.concatenate([self._log_polar(_flip_spectrum(mags, f)) for f in flips])
+        shifts, _ = phase_correlate_batch(self.ref_lp_rfft, np.fft.rfft2(lp), self.lp_shape)
+        angles = -shifts[:, 1] * 360.0 / LP_ANGLES
+        scales = np.exp(-shifts[:, 0] * np.log(self.max_radius) / self.lp_shape[1])
+        return angles, scales
+
+    def estimate_batch(self, targets, refine=REFINE):
+        """估计每张 targets 相对参考图像的几何变换，返回参数字典列表
+        matrix 为 2x3 仿射矩阵，cv2.warpAffine(target, matrix, (W, H)) 即对齐结果
+        refine 为撤销粗估计后再估计残余旋转 / 缩放的次数（旋转后的黑边会使单次估计偏差 1°~2°）"""
+        grays = [_gray(t) for t in targets]
+        for g in grays:
+            if g.shape != self.shape:
+                raise ValueError(f"图像尺寸 {g.shape} 与参考图像 {self.shape} 不一致")
+        n = len(grays)
+
+        # 第一步：对数极坐标相位相关估计角度与尺度；每个翻转取 θ 与 θ+180° 两个候选，
+        # 在缩小图上撤销后与参考相位相关，取相关峰最高者
+        angles, scales = self._rotation_scale(np.stack([self._shrink(g) for g in grays]), self.flips)
+        cands = [(k % n, f, angles[k] + extra, scales[k])
+                 for k, f in enumerate(f for f in self.flips for _ in range(n)) for extra in (0.0, 180.0)]
+        warped = np.stack([self._warp_small(grays[i], self._similarity(a, s) @ _flip_matrix(f, self.shape))
+                           for i, f, a, s in cands])
+        _, response = phase_correlate_batch(
+            self.ref_work_rfft, np.fft.rfft2(warped * self.work_window, s=self.work_dft_shape), self.work_dft_shape)
+        best = [max((j for j in range(len(cands)) if cands[j][0] == i), key=lambda j: response[j])
+                for i in range(n)]
+        flips = [cands[j][1] for j in best]
+        angle = np.array([cands[j][2] for j in best])
+        scale = np.array([cands[j][3] for j in best])
+
+        # 第二步：残余旋转 / 缩放（同一中心的旋转缩放可直接累加角度、累乘尺度）
+        def matrices():
+            return [self._similarity(a, s) @ _flip_matrix(f, self.shape) for f, a, s in zip(flips, angle, scale)]
+        for _ in range(refine):
+            da, ds = self._rotation_scale(np.stack([self._warp_small(g, m) for g, m in zip(grays, matrices())]),
+                                          ("none",))
+            angle, scale = angle + da, scale * ds
+        angle = (angle + 180) % 360 - 180
+        angle[np.abs(angle) < SNAP_ANGLE] = 0.0
+        scale[np.abs(scale - 1) < SNAP_SCALE] = 1.0
+
+        # 第三步：原尺寸上相位相关求平移
+        H, W = self.shape
+        mats = matrices()
+        warped = np.stack([cv2.warpAffine(g, m[:2], (W, H)) for g, m in zip(grays, mats)])
+        trans, response = phase_correlate_batch(
+            self.ref_rfft, np.fft.rfft2(warped * self.window, s=self.dft_shape), self.dft_shape)
+        snapped = np.round(trans)
+        trans = np.where(np.abs(trans - snapped) < SNAP_SHIFT, snapped, trans)
+
+        results = []
+        for i, m in enumerate(mats):
+            dx, dy = trans[i]
+            shift = np.array([[1, 0, -dx], [0, 1, -dy], [0, 0, 1]])
+            results.append({
+                "flip": flips[i],
+                "angle": float(angle[i]),
+                "scale": float(scale[i]),
+                "shift": (float(dx), float(dy)),
+                "response": float(response[i]),
+                "matrix": (shift @ m)[:2],
+            })
+        return results
+
+    def estimate(self, target):
+        return self.estimate_batch([target])[0]
+
+    def align_batch(self, targets, interpolation=cv2.INTER_LINEAR):
+        """对齐多张图像，返回 (对齐后的图像列表, 参数列表)；参考图像之外的区域填 0"""
+        h, w = self.shape
+        params = self.estimate_batch(targets)
+        aligned = [cv2.warpAffine(np.asarray(t), p["matrix"], (w, h), flags=interpolation)
+                   for t, p in zip(targets, params)]
+        return aligned, params
+
+    def align(self, target, interpolation=cv2.INTER_LINEAR):
+        aligned, params = self.align_batch([target], interpolation)
+        return aligned[0], params[0]
+
+def resynchronize(reference, target, flips=FLIPS, interpolation=cv2.INTER_LINEAR):
+    """单次使用：把 target 对齐到 reference，返回 (对齐后的图像, 参数)"""
+    return Synchronizer(reference, flips).align(target, interpolation)
@@ -0,0 +1,66 @@
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from wm_DCT import generate_watermark, prepare_watermark, embed_watermark
+
+# ------------------------------
+# 视频水印流水线
+# ------------------------------
+# 逐帧读取 -> 转 YCrCb -> 在亮度通道嵌入 DWT 水印 -> 转回 BGR -> 按原顺序写出
+# 水印只缩放、二值化一次；帧在线程池中并行处理，队列中最多 max_pending 帧，内存占用有界
+
+def _embed_frame(frame, wm_binary, alpha):
+    ycc = cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb)
+    h, w = wm_binary.shape[0] * 2, wm_binary.shape[1] * 2
+    ycc[:h, :w, 0] = embed_watermark(ycc[:h, :w, 0], None, alpha, wm_binary=wm_binary)
+    return cv2.cvtColor(ycc, cv2.COLOR_YCrCb2BGR)
+
+def watermark_video(in_path, out_path, watermark=None, alpha=0.1, workers=4, max_pending=16, fourcc="mp4v"):
+    """给视频每一帧的亮度通道嵌入水印，返回 {frames, seconds, fps}"""
+    if watermark is None:
+        watermark = generate_watermark()
+    cap = cv2.VideoCapture(in_path)
+    if not cap.isOpened():
+        raise IOError(f"无法打开视频: {in_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+    if not writer.isOpened():
+        cap.release()
+        raise IOError(f"无法创建视频: {out_path}")
+
+    # 奇数尺寸时最后一行/列不参与嵌入
+    wm_binary = prepare_watermark(watermark, (height // 2, width // 2))
+    frames = 0
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            while True:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                pending.append(pool.submit(_embed_frame, frame, wm_binary, alpha))
+                if len(pending) >= max_pending:
+                    writer.write(pending.popleft().result())
+                    frames += 1
+            while pending:
+                writer.write(pending.popleft().result())
+                frames += 1
+    finally:
+        cap.release()
+        writer.release()
+    elapsed = time.perf_counter() - start
+    return {"frames": frames, "seconds": elapsed, "fps": frames / elapsed if elapsed > 0 else 0.0}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("用法: python wm_video.py 输入视频 输出视频 [线程数]")
+        sys.exit(1)
+    stats = watermark_video(sys.argv[1], sys.argv[2], workers=int(sys.argv[3]) if len(sys.argv) > 3 else 4)
+    print(f"共 {stats['frames']} 帧, 用时 {stats['seconds']:.2f}s, {stats['fps']:.1f} 帧/秒")
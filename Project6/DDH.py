@@ -90,7 +90,6 @@ def party2_round2(p1_vals: List[int], pairs_wt: List[Tuple[str,int]], k2: int, p
 # ------------------------------
 import random
 import hashlib
-from tabulate import tabulate
 
 # ------------------------------
 # 群操作和哈希
@@ -129,7 +128,15 @@ def he_add(c1: int, c2: int) -> int:
 # DDH-based Private Intersection-Sum Protocol
 # ------------------------------
 
-def ddh_intersection_sum_table(set_v, pairs_wt, p):
+def ddh_intersection_sum_table(set_v, pairs_wt, p, verbose=True, stats=None):
+    if not verbose:
+        # 静默路径: 不生成中间表格, 每轮以 JSON 写入 logging("psi")
+        from psi_group import ModPGroup, group_intersection_sum
+        return group_intersection_sum(ModPGroup(p), set_v, pairs_wt, stats)
+
+    # 只有打印表格时才需要 tabulate
+    from tabulate import tabulate
+
     print("\n===== 协议初始化 =====")
     print(f"Party1输入集合 V = {set_v}")
     print(f"Party2输入集合 W = {pairs_wt}")
@@ -190,7 +197,7 @@ def ddh_intersection_sum_table(set_v, pairs_wt, p):
     # Round3(P1)
     # ------------------------------
     print("\n===== Round3: Party1 =====")
-    set_v_hashed = {modexp(hash_to_int(v, p), k1, p) for v in set_v}
+    set_v_hashed = set(Z_list)  # {H(vi)^k1k2}
     round3_table = []
     intersection_indices = []
     encrypted_sum = 0
@@ -0,0 +1,103 @@
+import sys
+import json
+import time
+import argparse
+import platform
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Set, Optional
+
+from psi_group import ModPGroup, ECGroup, group_intersection_sum
+
+# ------------------------------
+# 交集和协议规模测试
+# ------------------------------
+#
+# 每个 (规模, 交集比例) 组合在独立子进程中执行, 使峰值 RSS 互不影响;
+# 结果为 JSON 报告, 每条记录包含各轮耗时、指数运算速率、峰值内存与通信字节数
+
+def make_inputs(n: int, ratio: float) -> Tuple[Set[str], List[Tuple[str, int]]]:
+    """生成 |V| = |W| = n 且交集大小为 ratio*n 的输入"""
+    common = int(n * ratio)
+    set_v = {f"v{i}" for i in range(n)}
+    pairs_wt = [(f"v{i}", i % 100 + 1) for i in range(common)]
+    pairs_wt += [(f"w{i}", i % 100 + 1) for i in range(n - common)]
+    return set_v, pairs_wt
+
+def _peak_rss_bytes() -> Optional[int]:
+    """当前进程的峰值常驻内存; resource 仅 Unix 可用, Windows 上改用 psutil, 都没有时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def run_case(n: int, ratio: float, group_name: str, p: int) -> Dict:
+    group = ECGroup() if group_name == "sm2" else ModPGroup(p)
+    set_v, pairs_wt = make_inputs(n, ratio)
+    stats = {}
+    t0 = time.perf_counter()
+    group_intersection_sum(group, set_v, pairs_wt, stats)
+    total = time.perf_counter() - t0
+    exps = sum(r["exps"] for r in stats["rounds"].values())
+    return {
+        "n": n,
+        "ratio": ratio,
+        "group": stats["group"],
+        "cardinality": stats["cardinality"],
+        "seconds": total,
+        "rounds": stats["rounds"],
+        "exps": exps,
+        "exps_per_sec": exps / total if total > 0 else None,
+        "bytes_exchanged": sum(r["bytes"] for r in stats["rounds"].values()),
+        "peak_rss_bytes": _peak_rss_bytes(),
+    }
+
+def run_sweep(sizes: List[int], ratios: List[float], group_name: str = "modp",
+              p: int = 2147483647, repeat: int = 1) -> Dict:
+    results = []
+    for n in sizes:
+        for ratio in ratios:
+            for _ in range(repeat):
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    rec = pool.submit(run_case, n, ratio, group_name, p).result()
+                rss = rec["peak_rss_bytes"]
+                print(f"n={n:<9} ratio={ratio:<5} {rec['seconds']:.3f}s {rec['exps_per_sec']:.0f} exp/s "
+                      f"rss={'n/a' if rss is None else f'{rss / 2**20:.1f}MiB'}", file=sys.stderr)
+                results.append(rec)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "group": group_name,
+        "p_bits": p.bit_length() if group_name == "modp" else 256,
+        "results": results,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DDH 交集和协议规模测试")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="逗号分隔的集合规模, 如 1000,10000,...,10000000")
+    parser.add_argument("--ratios", default="0.1,0.5,1.0", help="逗号分隔的交集比例")
+    parser.add_argument("--group", choices=["modp", "sm2"], default="modp")
+    parser.add_argument("--p", type=int, default=2147483647, help="modp 群的素数")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--out", default="-", help="JSON 报告输出路径, - 表示标准输出")
+    args = parser.parse_args(argv)
+
+    report = run_sweep([int(float(s)) for s in args.sizes.split(",")],
+                       [float(r) for r in args.ratios.split(",")],
+                       args.group, args.p, args.repeat)
+    text = json.dumps(report, indent=2)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w") as f:
+            f.write(text)
+
+if __name__ == "__main__":
+    main()
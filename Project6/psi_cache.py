@@ -0,0 +1,196 @@
+import os
+import mmap
+import random
+import struct
+import hashlib
+from typing import Dict, List, Set
+
+from DDH import modexp, gen_private_key
+from psi_wire import element_width
+
+# ------------------------------
+# 盲化元素持久缓存
+# ------------------------------
+#
+# 文件布局: 头部 magic(4) | version(1) | width(2) | p(width) | k1(width)
+#          记录 flag(1) | SHA-256(v)(32) | H(v)^k1(width), 定长追加写
+# flag=0 表示已删除(墓碑), 由 compact 清理
+# 注意: 头部保存长期私钥 k1, 文件需按私钥同等级别保护
+
+MAGIC = b"PSIC"
+VERSION = 1
+HEADER = struct.Struct(">4sBH")
+KEY_BYTES = 32
+LIVE, DEAD = 1, 0
+
+def element_key(v: str) -> bytes:
+    """元素索引键, 与 hash_to_int 使用同一个 SHA-256"""
+    return hashlib.sha256(v.encode()).digest()
+
+class BlindedStore:
+    """元素 -> H(v)^k1 的磁盘存储, 内存中只保留 键 -> 记录偏移 的索引"""
+
+    def __init__(self, path: str, p: int):
+        self.path = path
+        self.p = p
+        self.width = element_width(p)
+        self.record_size = 1 + KEY_BYTES + self.width
+        self.header_size = HEADER.size + 2 * self.width
+        self.index: Dict[bytes, int] = {}
+        self.dead = 0
+        if os.path.exists(path):
+            self._open()
+        else:
+            self._create()
+
+    def _create(self):
+        self.k1 = gen_private_key(self.p)
+        with open(self.path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.width))
+            f.write(self.p.to_bytes(self.width, 'big'))
+            f.write(self.k1.to_bytes(self.width, 'big'))
+        self._f = open(self.path, "r+b")
+        self._mm = None
+
+    def _open(self):
+        self._f = open(self.path, "r+b")
+        head = self._f.read(self.header_size)
+        magic, version, width = HEADER.unpack_from(head, 0)
+        if magic != MAGIC or version != VERSION or width != self.width:
+            raise ValueError("缓存文件格式不匹配")
+        off = HEADER.size
+        if int.from_bytes(head[off:off + width], 'big') != self.p:
+            raise ValueError("缓存文件的群参数 p 不一致")
+        self.k1 = int.from_bytes(head[off + width:off + 2 * width], 'big')
+        # 追加写时崩溃会留下不完整的末尾记录: 截断到整数条记录, 之后的追加才能对齐记录边界
+        size = os.fstat(self._f.fileno()).st_size
+        whole = self.header_size + (size - self.header_size) // self.record_size * self.record_size
+        if size > whole:
+            self._f.truncate(whole)
+        self._remap()
+        size = len(self._mm) if self._mm is not None else 0
+        for off in range(self.header_size, size, self.record_size):
+            key = self._mm[off + 1:off + 1 + KEY_BYTES]
+            if self._mm[off] == LIVE:
+                self.index[key] = off
+            else:
+                self.dead += 1
+
+    def _remap(self):
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+        self._f.flush()
+        size = os.fstat(self._f.fileno()).st_size
+        self._mm = mmap.mmap(self._f.fileno(), size) if size > self.header_size else None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get(self, key: bytes) -> int:
+        off = self.index[key] + 1 + KEY_BYTES
+        return int.from_bytes(self._mm[off:off + self.width], 'big')
+
+    def values(self) -> List[int]:
+        mm = self._mm
+        return [int.from_bytes(mm[off + 1 + KEY_BYTES:off + self.record_size], 'big')
+                for off in self.index.values()]
+
+    def delete(self, keys) -> int:
+        n = 0
+        for key in keys:
+            off = self.index.pop(key, None)
+            if off is not None:
+                self._mm[off] = DEAD
+                n += 1
+        self.dead += n
+        return n
+
+    def insert(self, items: Dict[bytes, int]) -> int:
+        """追加写入新记录; items 为 键 -> H(v)^k1"""
+        if not items:
+            return 0
+        self._f.seek(0, os.SEEK_END)
+        off = self._f.tell()
+        chunk = bytearray()
+        for key, val in items.items():
+            chunk += bytes((LIVE,)) + key + val.to_bytes(self.width, 'big')
+            self.index[key] = off
+            off += self.record_size
+        self._f.write(chunk)
+        self._remap()
+        return len(items)
+
+    def compact(self) -> int:
+        """重写文件, 去掉墓碑记录; 返回回收的记录数"""
+        tmp = self.path + ".compact"
+        new_index = {}
+        with open(tmp, "wb") as out:
+            self._f.seek(0)
+            out.write(self._f.read(self.header_size))
+            off = self.header_size
+            for key, old in self.index.items():
+                out.write(self._mm[old:old + self.record_size])
+                new_index[key] = off
+                off += self.record_size
+        reclaimed = self.dead
+        self.close()
+        os.replace(tmp, self.path)
+        self._f = open(self.path, "r+b")
+        self._mm = None
+        self._remap()
+        self.index, self.dead = new_index, 0
+        return reclaimed
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+        self._f.close()
+
+# ------------------------------
+# 增量会话
+# ------------------------------
+
+class PSISession:
+    """Party1 的长期会话: 固定 k1, 每次 Round1 只对新增元素做指数运算"""
+
+    def __init__(self, path: str, p: int):
+        self.p = p
+        self.store = BlindedStore(path, p)
+        self.last_stats = {}
+
+    @property
+    def k1(self) -> int:
+        return self.store.k1
+
+    def round1(self, set_v: Set[str]) -> List[int]:
+        """增量 Round1: 返回打乱后的 H(v)^k1 列表"""
+        current = {element_key(v) for v in set_v}
+        deleted = self.store.delete([k for k in self.store.index if k not in current])
+        new_keys = [k for k in current if k not in self.store.index]
+        # H(v) = SHA-256(v) mod p, 直接由索引键得到, 无需再次哈希
+        inserted = self.store.insert({
+            k: modexp(int.from_bytes(k, 'big') % self.p, self.k1, self.p) for k in new_keys
+        })
+        vals = self.store.values()
+        random.shuffle(vals)
+        self.last_stats = {
+            "inserted": inserted,
+            "deleted": deleted,
+            "reused": len(vals) - inserted,
+            "dead_records": self.store.dead,
+        }
+        return vals
+
+    def compact(self) -> int:
+        return self.store.compact()
+
+    def close(self):
+        self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,85 @@
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple, Set, Optional
+
+from DDH import generate_he_keypair, he_encrypt, he_decrypt, he_add
+from psi_wire import pack_elements, RoundMessage
+from psi_group import ModPGroup
+
+# ------------------------------
+# 一对多: Party1 的 Round1 结果复用于多个 Party2
+# ------------------------------
+#
+# Party1 只做一次 H(v)^k1, 编码为 psi_wire 格式后分发给各个任务;
+# 每个 Party2 的 k2 与同态密钥对都在各自任务内生成, 互不共享。
+# 注意: 同一份 H(v)^k1 发给多个合作方, 合谋的合作方可以关联彼此收到的值。
+
+def _partner_job(name: str, round1_payload: bytes, pairs_wt: List[Tuple[str, int]],
+                 k1: int, group) -> Tuple[str, int, int]:
+    """单个合作方的 Round2(P2) + Round3(P1) + 解密, 返回 (名称, 交集和, 交集大小)"""
+    k2 = group.random_scalar()
+    pk, sk = generate_he_keypair()
+
+    # Round2: Party2
+    z_vals = [group.exp(v, k2) for v in RoundMessage(round1_payload).elements(decode=group.decode)]
+    random.shuffle(z_vals)
+    w_list = [(group.exp(group.hash_to_element(w), k2), he_encrypt(t, pk)) for w, t in pairs_wt]
+    random.shuffle(w_list)
+
+    # Round3: Party1
+    z_set = set(z_vals)
+    encrypted_sum, cardinality = 0, 0
+    for h_k2, c in w_list:
+        if group.exp(h_k2, k1) in z_set:
+            cardinality += 1
+            encrypted_sum = c if encrypted_sum == 0 else he_add(encrypted_sum, c)
+
+    return name, he_decrypt(encrypted_sum, pk, sk), cardinality
+
+def fanout_intersection_sum(set_v: Set[str], partners: Dict[str, List[Tuple[str, int]]],
+                            p: Optional[int] = None, max_workers: Optional[int] = None,
+                            session=None, group=None) -> Dict:
+    """对多个 Party2 数据集计算交集和
+    session 为 psi_cache.PSISession 时复用其缓存与 k1(仅限 Z_p);
+    group 为 psi_group 中的群对象, 缺省为 ModPGroup(p)"""
+    if group is None:
+        group = ModPGroup(p)
+    if session is not None:
+        if not isinstance(group, ModPGroup) or session.p != group.p:
+            raise ValueError("PSISession 只适用于相同 p 的 Z_p 群")
+        k1 = session.k1
+        blinded = session.round1(set_v)
+    else:
+        k1 = group.random_scalar()
+        blinded = [group.exp(group.hash_to_element(v), k1) for v in set_v]
+        random.shuffle(blinded)
+    payload = pack_elements(blinded, group.width, group.encode)
+
+    per_partner, errors = {}, {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_partner_job, name, payload, pairs_wt, k1, group): name
+                   for name, pairs_wt in partners.items()}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                _, total, cardinality = fut.result()
+                per_partner[name] = {"sum": total, "cardinality": cardinality}
+            except Exception as e:
+                errors[name] = str(e)
+
+    return {
+        "per_partner": per_partner,
+        "total": sum(r["sum"] for r in per_partner.values()),
+        "cardinality": sum(r["cardinality"] for r in per_partner.values()),
+        "round1_bytes": len(payload),
+        "errors": errors,
+    }
+
+if __name__ == "__main__":
+    p = 2147483647
+    set_v = {"alice", "bob", "carol"}
+    partners = {
+        "shop_a": [("alice", 10), ("dave", 20), ("carol", 30)],
+        "shop_b": [("bob", 5), ("erin", 7)],
+    }
+    print(fanout_intersection_sum(set_v, partners, p))
@@ -0,0 +1,234 @@
+import json
+import time
+import random
+import secrets
+import hashlib
+import logging
+from typing import Dict, List, Tuple, Set, Optional
+
+from DDH import (hash_to_int, modexp, gen_private_key, generate_he_keypair,
+                 he_encrypt, he_decrypt, he_add)
+from psi_wire import element_width, HEADER, CT_WIDTH
+
+logger = logging.getLogger("psi")
+
+# ------------------------------
+# 群抽象
+# ------------------------------
+#
+# 协议只需要: hash_to_element / random_scalar / exp / encode / decode / width
+# ModPGroup 对应 DDH.py 原有的 Z_p* 实现, ECGroup 为 SM2 曲线上的点群
+
+class ModPGroup:
+    """Z_p* 乘法群"""
+    name = "modp"
+
+    def __init__(self, p: int):
+        self.p = p
+        self.width = element_width(p)
+
+    def hash_to_element(self, x: str) -> int:
+        return hash_to_int(x, self.p)
+
+    def random_scalar(self) -> int:
+        return gen_private_key(self.p)
+
+    def exp(self, elem: int, k: int) -> int:
+        return modexp(elem, k, self.p)
+
+    def encode(self, elem: int) -> bytes:
+        return elem.to_bytes(self.width, 'big')
+
+    def decode(self, data) -> int:
+        return int.from_bytes(data, 'big')
+
+# ------------------------------
+# SM2 椭圆曲线群
+# ------------------------------
+#
+# 参数取自 GM/T 0003-2012 推荐曲线(与 Project5/sm2.py 相同的 p, a, G, n;
+# 注意 sm2.py 中的 b 被截断, 这里使用标准中的完整值)
+
+SM2_P = 0xFFFFFFFEFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF00000000FFFFFFFFFFFFFFFF
+SM2_A = 0xFFFFFFFEFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF00000000FFFFFFFFFFFFFFFC
+SM2_B = 0x28E9FA9E9D9F5E344D5A9E4BCF6509A7F39789F515AB8F92DDBCBD414D940E93
+SM2_GX = 0x32C4AE2C1F1981195F9904466A39C9948FE30BBFF2660BE1715A4589334C74C7
+SM2_GY = 0xBC3736A2F4F6779C59BDCEE36B692153D0A9877CC62A474002DF32E52139F0A0
+SM2_N = 0xFFFFFFFEFFFFFFFFFFFFFFFFFFFFFFFF7203DF6B21C6052B53BBF40939D54123
+
+def _jacobian_double(P, p):
+    """a = -3 的雅可比坐标倍点"""
+    X, Y, Z = P
+    if Y == 0 or Z == 0:
+        return (1, 1, 0)
+    delta = Z * Z % p
+    gamma = Y * Y % p
+    beta = X * gamma % p
+    alpha = 3 * (X - delta) * (X + delta) % p
+    X3 = (alpha * alpha - 8 * beta) % p
+    Z3 = ((Y + Z) ** 2 - gamma - delta) % p
+    Y3 = (alpha * (4 * beta - X3) - 8 * gamma * gamma) % p
+    return (X3, Y3, Z3)
+
+def _jacobian_add(P, Q, p):
+    """雅可比坐标点加"""
+    X1, Y1, Z1 = P
+    X2, Y2, Z2 = Q
+    if Z1 == 0:
+        return Q
+    if Z2 == 0:
+        return P
+    Z1Z1 = Z1 * Z1 % p
+    Z2Z2 = Z2 * Z2 % p
+    U1 = X1 * Z2Z2 % p
+    U2 = X2 * Z1Z1 % p
+    S1 = Y1 * Z2 * Z2Z2 % p
+    S2 = Y2 * Z1 * Z1Z1 % p
+    H = (U2 - U1) % p
+    r = (S2 - S1) % p
+    if H == 0:
+        return _jacobian_double(P, p) if r == 0 else (1, 1, 0)
+    HH = H * H % p
+    HHH = H * HH % p
+    V = U1 * HH % p
+    X3 = (r * r - HHH - 2 * V) % p
+    Y3 = (r * (V - X3) - S1 * HHH) % p
+    Z3 = Z1 * Z2 * H % p
+    return (X3, Y3, Z3)
+
+class ECGroup:
+    """SM2 曲线点群, 元素为仿射坐标 (x, y), 线上编码为 33 字节压缩点"""
+    name = "sm2"
+    width = 33
+
+    def __init__(self, p=SM2_P, a=SM2_A, b=SM2_B, n=SM2_N, g=(SM2_GX, SM2_GY)):
+        self.p, self.a, self.b, self.n, self.g = p, a, b, n, g
+        if a != p - 3:
+            raise ValueError("倍点公式要求 a = -3")
+        if p % 4 != 3:
+            raise ValueError("开方公式要求 p ≡ 3 (mod 4)")
+
+    def _sqrt(self, v: int) -> Optional[int]:
+        y = pow(v, (self.p + 1) // 4, self.p)
+        return y if y * y % self.p == v else None
+
+    def is_on_curve(self, P) -> bool:
+        x, y = P
+        return (y * y - (x * x * x + self.a * x + self.b)) % self.p == 0
+
+    def hash_to_element(self, x: str) -> Tuple[int, int]:
+        """try-and-increment 哈希到曲线(余因子为 1, 所得点即在素数阶群中)"""
+        data = x.encode()
+        ctr = 0
+        while True:
+            h = hashlib.sha256(ctr.to_bytes(4, 'big') + data).digest()
+            px = int.from_bytes(h, 'big') % self.p
+            py = self._sqrt((px * px * px + self.a * px + self.b) % self.p)
+            if py is not None:
+                return (px, py if py % 2 == 0 else self.p - py)
+            ctr += 1
+
+    def random_scalar(self) -> int:
+        return secrets.randbelow(self.n - 1) + 1
+
+    def exp(self, elem: Tuple[int, int], k: int) -> Tuple[int, int]:
+        """标量乘 k*P: 4 位固定窗口, 雅可比坐标, 只在最后做一次求逆"""
+        p = self.p
+        k %= self.n
+        if k == 0:
+            raise ValueError("标量不能为 0")
+        base = (elem[0], elem[1], 1)
+        table = [(1, 1, 0), base]
+        for _ in range(14):
+            table.append(_jacobian_add(table[-1], base, p))
+        R = (1, 1, 0)
+        for shift in range((k.bit_length() + 3) // 4 * 4 - 4, -4, -4):
+            for _ in range(4):
+                R = _jacobian_double(R, p)
+            d = (k >> shift) & 0xF
+            if d:
+                R = _jacobian_add(R, table[d], p)
+        X, Y, Z = R
+        if Z == 0:
+            raise ValueError("结果为无穷远点")
+        zinv = pow(Z, -1, p)
+        zinv2 = zinv * zinv % p
+        return (X * zinv2 % p, Y * zinv2 * zinv % p)
+
+    def encode(self, elem: Tuple[int, int]) -> bytes:
+        x, y = elem
+        return bytes((2 + (y & 1),)) + x.to_bytes(32, 'big')
+
+    def decode(self, data) -> Tuple[int, int]:
+        prefix = data[0]
+        if prefix not in (2, 3) or len(data) != 33:
+            raise ValueError("不是压缩点编码")
+        x = int.from_bytes(data[1:], 'big')
+        y = self._sqrt((x * x * x + self.a * x + self.b) % self.p)
+        if y is None:
+            raise ValueError("点不在曲线上")
+        if (y & 1) != (prefix & 1):
+            y = self.p - y
+        return (x, y)
+
+# ------------------------------
+# 基于群抽象的交集和协议
+# ------------------------------
+
+def _log_round(name: str, record: Dict) -> None:
+    """每轮一条 JSON 日志, 便于机器解析"""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"event": name, **record}))
+
+def group_intersection_sum(group, set_v: Set[str], pairs_wt: List[Tuple[str, int]],
+                           stats: Optional[Dict] = None) -> int:
+    """不打印中间表格的完整协议执行, 群由 group 指定
+    stats 不为 None 时写入每轮耗时、指数运算次数与通信字节数"""
+    k1 = group.random_scalar()
+    k2 = group.random_scalar()
+    pk, sk = generate_he_keypair()
+    rounds = {}
+
+    # Round1: Party1
+    t0 = time.perf_counter()
+    h_v_k1 = [group.exp(group.hash_to_element(v), k1) for v in set_v]
+    random.shuffle(h_v_k1)
+    rounds["round1"] = {"seconds": time.perf_counter() - t0, "exps": len(h_v_k1),
+                        "bytes": HEADER.size + len(h_v_k1) * group.width}
+    _log_round("round1", rounds["round1"])
+
+    # Round2: Party2
+    t0 = time.perf_counter()
+    z_vals = [group.exp(h, k2) for h in h_v_k1]
+    random.shuffle(z_vals)
+    w_list = [(group.exp(group.hash_to_element(w), k2), he_encrypt(t, pk)) for w, t in pairs_wt]
+    random.shuffle(w_list)
+    rounds["round2"] = {"seconds": time.perf_counter() - t0, "exps": len(z_vals) + len(w_list),
+                        "bytes": 2 * HEADER.size + len(z_vals) * group.width
+                                 + len(w_list) * (group.width + CT_WIDTH)}
+    _log_round("round2", rounds["round2"])
+
+    # Round3: Party1
+    t0 = time.perf_counter()
+    z_set = set(z_vals)
+    encrypted_sum, cardinality = 0, 0
+    for h_k2, c in w_list:
+        if group.exp(h_k2, k1) in z_set:
+            cardinality += 1
+            encrypted_sum = c if encrypted_sum == 0 else he_add(encrypted_sum, c)
+    rounds["round3"] = {"seconds": time.perf_counter() - t0, "exps": len(w_list), "bytes": CT_WIDTH}
+    _log_round("round3", rounds["round3"])
+
+    result = he_decrypt(encrypted_sum, pk, sk)
+    if stats is not None:
+        stats["group"] = group.name
+        stats["rounds"] = rounds
+        stats["cardinality"] = cardinality
+    _log_round("output", {"cardinality": cardinality})
+    return result
+
+if __name__ == "__main__":
+    set_v = {"alice", "bob", "carol"}
+    pairs_wt = [("alice", 10), ("dave", 20), ("carol", 30)]
+    for group in (ModPGroup(2147483647), ECGroup()):
+        print(f"{group.name}: 交集和 = {group_intersection_sum(group, set_v, pairs_wt)}, 元素编码 {group.width} 字节")
@@ -0,0 +1,204 @@
+import sys
+import mmap
+import struct
+import hashlib
+from array import array
+from typing import Callable, Iterable, Iterator, List, Tuple, Optional
+
+# ------------------------------
+# 轮消息二进制格式
+# ------------------------------
+#
+# 头部(20字节, 大端): magic(4) | version(1) | kind(1) | elem_width(2) | ct_width(4) | count(8)
+# 负载按列存放: count 个定宽群元素, 随后(仅 KIND_PAIRS) count 个定宽密文
+# 定宽 + 列存使得任意下标/切片都可以直接在 memoryview 上定位, 无需逐个解析
+
+MAGIC = b"PSIW"
+VERSION = 1
+
+KIND_ELEMENTS = 1  # 群元素列表, 如 H(v)^k1、Z
+KIND_PAIRS = 2     # (群元素, 同态密文) 列表, 如 (H(w)^k2, AEnc(t))
+KIND_DIGESTS = 3   # 压缩元素: 截断摘要, 只用于相等比较
+
+HEADER = struct.Struct(">4sBBHIQ")
+CT_WIDTH = 8  # he_encrypt 输出 < 10**12, 8 字节足够
+
+def element_width(p: int) -> int:
+    """Z_p 中元素的定长字节数"""
+    return (p.bit_length() + 7) // 8
+
+def digest_element(x, width: int, nbytes: int = 8, encode: Optional[Callable] = None) -> bytes:
+    """元素压缩: 对定长编码取 SHA-256 并截断"""
+    data = encode(x) if encode is not None else x.to_bytes(width, 'big')
+    return hashlib.sha256(data).digest()[:nbytes]
+
+def _pack_header(kind: int, elem_width: int, ct_width: int, count: int) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, kind, elem_width, ct_width, count)
+
+def _ct_array(cts: Iterable[int]) -> array:
+    arr = array('Q', cts)
+    if sys.byteorder == 'little':
+        arr.byteswap()
+    return arr
+
+# ------------------------------
+# 编码
+# ------------------------------
+#
+# encode/decode 为可选的元素编解码函数(如 psi_group.ECGroup 的 33 字节压缩点),
+# 缺省时元素按 width 字节大端整数处理
+
+def _encoder(width: int, encode: Optional[Callable]) -> Callable:
+    return encode if encode is not None else (lambda v: v.to_bytes(width, 'big'))
+
+def pack_elements(vals: List, width: int, encode: Optional[Callable] = None) -> bytes:
+    """编码群元素列表"""
+    enc = _encoder(width, encode)
+    body = b"".join(enc(v) for v in vals)
+    return _pack_header(KIND_ELEMENTS, width, 0, len(vals)) + body
+
+def pack_digests(vals: List, width: int, nbytes: int = 8, encode: Optional[Callable] = None) -> bytes:
+    """编码压缩元素列表(每个元素 nbytes 字节)"""
+    body = b"".join(digest_element(v, width, nbytes, encode) for v in vals)
+    return _pack_header(KIND_DIGESTS, nbytes, 0, len(vals)) + body
+
+def pack_pairs(pairs: List[Tuple], width: int, encode: Optional[Callable] = None) -> bytes:
+    """编码 (群元素, 密文) 列表, 元素列与密文列分开存放"""
+    enc = _encoder(width, encode)
+    elems = b"".join(enc(h) for h, _ in pairs)
+    cts = _ct_array(c for _, c in pairs)
+    return _pack_header(KIND_PAIRS, width, CT_WIDTH, len(pairs)) + elems + cts.tobytes()
+
+# ------------------------------
+# 解码(零拷贝视图)
+# ------------------------------
+
+class RoundMessage:
+    """轮消息的只读视图, 底层可以是 bytes / bytearray / mmap"""
+
+    def __init__(self, buf, _mm: Optional[mmap.mmap] = None):
+        self._mm = _mm
+        self.buf = memoryview(buf)
+        if len(self.buf) < HEADER.size:
+            raise ValueError("轮消息长度不足")
+        magic, version, kind, ew, cw, count = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("不是有效的 PSI 轮消息")
+        self.kind, self.elem_width, self.ct_width, self.count = kind, ew, cw, count
+        self._elem_off = HEADER.size
+        self._ct_off = HEADER.size + count * ew
+        if len(self.buf) < self._ct_off + count * cw:
+            raise ValueError("轮消息长度不足")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _index(self, i: int) -> int:
+        """校验下标; 越界的下标会落到头部或密文列上, 必须报错而不是静默读写"""
+        if not 0 <= i < self.count:
+            raise IndexError(f"下标 {i} 越界(共 {self.count} 个元素)")
+        return i
+
+    def _span(self, start: int, stop: Optional[int]) -> Tuple[int, int]:
+        """校验 start 并把 stop 截到 [start, count]"""
+        if not 0 <= start <= self.count:
+            raise IndexError(f"起始下标 {start} 越界(共 {self.count} 个元素)")
+        stop = self.count if stop is None else max(start, min(stop, self.count))
+        return start, stop
+
+    def raw_element(self, i: int) -> memoryview:
+        """第 i 个元素的原始字节(不拷贝)"""
+        off = self._elem_off + self._index(i) * self.elem_width
+        return self.buf[off:off + self.elem_width]
+
+    def raw_elements(self, start: int = 0, stop: Optional[int] = None) -> memoryview:
+        """[start, stop) 元素区间的原始字节(不拷贝)"""
+        start, stop = self._span(start, stop)
+        w = self.elem_width
+        return self.buf[self._elem_off + start * w:self._elem_off + stop * w]
+
+    def element(self, i: int, decode: Optional[Callable] = None):
+        raw = self.raw_element(i)
+        return decode(raw) if decode is not None else int.from_bytes(raw, 'big')
+
+    def elements(self, start: int = 0, stop: Optional[int] = None,
+                 decode: Optional[Callable] = None) -> Iterator:
+        raw = self.raw_elements(start, stop)
+        w = self.elem_width
+        for off in range(0, len(raw), w):
+            yield decode(raw[off:off + w]) if decode is not None else int.from_bytes(raw[off:off + w], 'big')
+
+    def digests(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        """按字节串逐个返回元素, 适合与 digest_element 的结果比较"""
+        raw = self.raw_elements(start, stop)
+        w = self.elem_width
+        for off in range(0, len(raw), w):
+            yield bytes(raw[off:off + w])
+
+    def ciphertexts(self, start: int = 0, stop: Optional[int] = None) -> array:
+        if self.kind != KIND_PAIRS:
+            raise ValueError("该消息不含密文")
+        start, stop = self._span(start, stop)
+        arr = array('Q')
+        arr.frombytes(self.buf[self._ct_off + start * CT_WIDTH:self._ct_off + stop * CT_WIDTH])
+        if sys.byteorder == 'little':
+            arr.byteswap()
+        return arr
+
+    def pairs(self, start: int = 0, stop: Optional[int] = None,
+              decode: Optional[Callable] = None) -> Iterator[Tuple]:
+        return zip(self.elements(start, stop, decode), self.ciphertexts(start, stop))
+
+    def set_element(self, i: int, v, encode: Optional[Callable] = None) -> None:
+        """原地写入第 i 个元素(底层需可写)"""
+        off = self._elem_off + self._index(i) * self.elem_width
+        self.buf[off:off + self.elem_width] = _encoder(self.elem_width, encode)(v)
+
+    def set_ciphertext(self, i: int, c: int) -> None:
+        if self.kind != KIND_PAIRS:
+            raise ValueError("该消息不含密文")
+        off = self._ct_off + self._index(i) * CT_WIDTH
+        self.buf[off:off + CT_WIDTH] = c.to_bytes(CT_WIDTH, 'big')
+
+    def close(self) -> None:
+        """释放视图并关闭内存映射; 调用方仍持有 raw_element / raw_elements 返回的视图时
+        mmap 无法立即关闭, 此时只放弃引用, 待这些视图释放后由垃圾回收关闭"""
+        self.buf.release()
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ------------------------------
+# 轮文件(内存映射)
+# ------------------------------
+
+def save_round(path: str, payload: bytes) -> int:
+    """把编码后的轮消息写入文件, 返回字节数"""
+    with open(path, "wb") as f:
+        f.write(payload)
+    return len(payload)
+
+def load_round(path: str) -> RoundMessage:
+    """以只读内存映射方式打开轮文件"""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return RoundMessage(mm, _mm=mm)
+
+def create_round(path: str, kind: int, count: int, elem_width: int) -> RoundMessage:
+    """预分配轮文件并以可写内存映射方式打开, 用 set_element/set_ciphertext 逐个填充"""
+    ct_width = CT_WIDTH if kind == KIND_PAIRS else 0
+    size = HEADER.size + count * (elem_width + ct_width)
+    with open(path, "w+b") as f:
+        f.truncate(size)
+        mm = mmap.mmap(f.fileno(), size)
+    mm[:HEADER.size] = _pack_header(kind, elem_width, ct_width, count)
+    return RoundMessage(mm, _mm=mm)
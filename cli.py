@@ -0,0 +1,383 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+# ------------------------------
+# 统一命令行入口
+# ------------------------------
+# python cli.py [--bench [--bench-repeat N]] [--profile PREFIX] <组件> <命令> ...
+#   sm2  keygen / sign / verify / analyze   (Project5)
+#   psi  run                                (Project6)
+#   wm   embed / extract / evaluate         (Project2)
+# 各组件模块按需导入：只用 sm2 时不会加载 OpenCV，gmssl / cryptography 只在选中对应实现时才需要。
+# 每个命令返回 (结果, 工作量, 单位)；结果以 JSON 打印到标准输出，--bench / --profile 的报告打印到标准错误。
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+for _project in ("Project2", "Project5", "Project6"):
+    sys.path.insert(0, os.path.join(ROOT, _project))
+
+_stdin = None
+
+def _read_bytes(path):
+    """path 为 - 时读标准输入；只读一次并缓存，--bench 的重复执行拿到的是同一条消息"""
+    global _stdin
+    if path == "-":
+        if _stdin is None:
+            _stdin = sys.stdin.buffer.read()
+        return _stdin
+    with open(path, "rb") as f:
+        return f.read()
+
+def _write_json(obj, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+# ------------------------------
+# SM2 签名 / 验签
+# ------------------------------
+# sm2: Project5/sm2.py（SHA256 摘要，纯 Python）
+# gm : Project5/sm2_fake.py（SM3 + ZA 用户哈希，需要 gmssl；消息按 UTF-8 解码）
+# 密钥文件为 {"impl", "d", "P": [x, y]}，签名文件为 {"impl", "r", "s"}，整数均为十六进制字符串
+
+def _sm2_impl(name):
+    if name == "gm":
+        import sm2_fake
+        return {
+            "keygen": sm2_fake.GenerateKeypair,
+            "sign": lambda d, P, msg, uid: sm2_fake.SignWithSm2(d, msg.decode("utf-8"), uid, P),
+            "verify": lambda P, msg, sig, uid: sm2_fake.VerifySm2Signature(P, msg.decode("utf-8"), uid, sig),
+        }
+    import sm2
+    return {
+        "keygen": sm2.generate_keypair,
+        "sign": lambda d, P, msg, uid: sm2.sm2_sign(msg, d)[0],
+        "verify": lambda P, msg, sig, uid: sm2.sm2_verify(msg, sig, P),
+    }
+
+def _load_key(path):
+    key = _read_json(path)
+    P = tuple(int(v, 16) for v in key["P"])
+    return key["impl"], (int(key["d"], 16) if "d" in key else None), P
+
+def cmd_sm2_keygen(args):
+    d, P = _sm2_impl(args.impl)["keygen"]()
+    _write_json({"impl": args.impl, "d": hex(d), "P": [hex(P[0]), hex(P[1])]}, args.out)
+    if args.pub:
+        _write_json({"impl": args.impl, "P": [hex(P[0]), hex(P[1])]}, args.pub)
+    return {"key": args.out, "public": args.pub}, 1, "keys"
+
+def cmd_sm2_sign(args):
+    impl, d, P = _load_key(args.key)
+    if d is None:
+        raise SystemExit(f"{args.key} 中没有私钥")
+    msg = _read_bytes(args.input)
+    r, s = _sm2_impl(impl)["sign"](d, P, msg, args.uid)
+    sig = {"impl": impl, "r": hex(r), "s": hex(s)}
+    if args.out:
+        _write_json(sig, args.out)
+    return sig, len(msg), "bytes"
+
+def cmd_sm2_verify(args):
+    impl, _, P = _load_key(args.key)
+    sig = _read_json(args.sig)
+    msg = _read_bytes(args.input)
+    valid = bool(_sm2_impl(impl)["verify"](P, msg, (int(sig["r"], 16), int(sig["s"], 16)), args.uid))
+    args.exit_code = 0 if valid else 1
+    return {"valid": valid}, len(msg), "bytes"
+
+def cmd_sm2_analyze(args):
+    """Project5/sm2_poc.py 中的 k 泄露 / k 重用 / 多用户共用 k 攻击验证（需要 cryptography）"""
+    from sm2_poc import SM2SecurityAnalysis
+    analyzer = SM2SecurityAnalysis()
+    data = analyzer.generate_test_cases(args.users)
+    keys, msgs, k = data["private_keys"], data["msgs"], data["fixed_k"]
+    leak = analyzer.k_leakage_attack(keys[0], msgs[0], k)
+    reuse = analyzer.k_reuse_attack(keys[0], msgs[0], msgs[1], k)
+    shared = analyzer.multi_user_k_share_attack(keys, msgs, k)
+    return {
+        "k_leakage": {"sm2": leak["sm2_valid"], "ecdsa": leak["ecdsa_valid"]},
+        "k_reuse": {"sm2": reuse["sm2_valid"], "ecdsa": reuse["ecdsa_valid"]},
+        "k_shared": [r["is_valid"] for r in shared],
+    }, args.users, "users"
+
+# ------------------------------
+# PSI 交集和
+# ------------------------------
+# --set-v 每行一个标识；--pairs 每行 "标识,权重"，可重复给出多个合作方（走 psi_fanout 进程池，结果按文件路径区分）
+
+def _read_set(path):
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+def _read_pairs(path):
+    pairs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                w, t = line.rsplit(",", 1)
+                pairs.append((w.strip(), int(t)))
+    return pairs
+
+def cmd_psi_run(args):
+    from psi_group import ModPGroup, ECGroup, group_intersection_sum
+    group = ECGroup() if args.group == "sm2" else ModPGroup(args.p)
+    set_v = _read_set(args.set_v)
+    if len(set(args.pairs)) != len(args.pairs):
+        raise SystemExit("--pairs 中有重复的文件")
+    # 以命令行给出的路径区分合作方：a/w.txt 与 b/w.txt 同名也不会互相覆盖
+    partners = {p: _read_pairs(p) for p in args.pairs}
+    if len(partners) == 1:
+        (name, pairs_wt), = partners.items()
+        stats = {}
+        total = group_intersection_sum(group, set_v, pairs_wt, stats)
+        result = {"total": total, "cardinality": stats["cardinality"], "group": stats["group"],
+                  "rounds": stats["rounds"]}
+    else:
+        from psi_fanout import fanout_intersection_sum
+        result = fanout_intersection_sum(set_v, partners, max_workers=args.workers, group=group)
+    work = len(set_v) + sum(len(p) for p in partners.values())
+    return result, work, "elements"
+
+# ------------------------------
+# 数字水印
+# ------------------------------
+# lsb  : Project2/wm.py 文字位图 LSB（所有通道，提取读第 0 通道）
+# dwt  : Project2/wm_DCT.py 单级 haar LL 嵌入，灰度，非盲（提取需 --original）
+# dct  : Project2/wm_DCT.py 8x8 分块 DCT，灰度，盲提取
+# color: Project2/wm_color.py YCrCb 亮度多级小波，彩色，非盲
+
+WM_METHODS = ("lsb", "dwt", "dct", "color")
+
+def _imread(path, method):
+    import cv2
+    flag = cv2.IMREAD_GRAYSCALE if method in ("dwt", "dct") else cv2.IMREAD_COLOR
+    img = cv2.imread(path, flag)
+    if img is None:
+        raise SystemExit(f"无法读取图像: {path}")
+    return img
+
+def _imwrite(path, img):
+    import cv2
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if not cv2.imwrite(path, img):
+        raise SystemExit(f"无法写入图像: {path}")
+
+def _load_watermark(args):
+    import cv2
+    from wm_DCT import generate_watermark
+    if args.watermark:
+        return cv2.imread(args.watermark, cv2.IMREAD_GRAYSCALE)
+    return generate_watermark(args.text)
+
+def cmd_wm_embed(args):
+    host = _imread(args.input, args.method)
+    if args.method == "lsb":
+        from wm import renderTextBitmap, embedBitmapLSB
+        bitmap, origin = renderTextBitmap(args.text, args.font_size, fontPath=args.font)
+        marked = embedBitmapLSB(host, bitmap, origin)
+    elif args.method == "dwt":
+        from wm_DCT import embed_watermark
+        host = host[:host.shape[0] // 2 * 2, :host.shape[1] // 2 * 2]
+        marked = embed_watermark(host, _load_watermark(args), args.alpha)
+    elif args.method == "dct":
+        from wm_DCT import embed_watermark_dct
+        marked = embed_watermark_dct(host, _load_watermark(args), args.strength, quality=args.quality)
+    else:
+        from wm_color import embed_watermark_color
+        marked = embed_watermark_color(host, _load_watermark(args), args.alpha,
+                                       level=args.level, workers=args.workers)
+    _imwrite(args.out, marked)
+    from wm_metrics import psnr
+    return {"out": args.out, "psnr": psnr(host, marked)}, host.shape[0] * host.shape[1], "pixels"
+
+def cmd_wm_extract(args):
+    marked = _imread(args.input, args.method)
+    if (args.method in ("dwt", "color") or args.sync) and not args.original:
+        raise SystemExit("dwt / color 提取与 --sync 都需要 --original")
+    if args.sync:
+        import cv2
+        from wm_sync import resynchronize
+        reference = _imread(args.original, args.method)[:marked.shape[0], :marked.shape[1]]
+        marked, params = resynchronize(reference, marked,
+                                       interpolation=cv2.INTER_NEAREST if args.method == "lsb" else cv2.INTER_LINEAR)
+    if args.method == "lsb":
+        extracted = (marked[:, :, 0] & 1) * 255
+    elif args.method == "dwt":
+        from wm_DCT import extract_watermark
+        original = _imread(args.original, args.method)
+        h, w = original.shape[0] // 2 * 2, original.shape[1] // 2 * 2
+        extracted = extract_watermark(marked[:h, :w], original[:h, :w], args.alpha)
+    elif args.method == "dct":
+        from wm_DCT import extract_watermark_dct
+        extracted = extract_watermark_dct(marked, tuple(args.wm_shape))
+    else:
+        from wm_color import extract_watermark_color
+        extracted = extract_watermark_color(marked, _imread(args.original, args.method), args.alpha,
+                                            level=args.level, workers=args.workers)
+    _imwrite(args.out, extracted)
+    result = {"out": args.out}
+    if args.sync:
+        result["sync"] = {k: v for k, v in params.items() if k != "matrix"}
+    if args.reference:
+        import cv2
+        from wm_metrics import nc
+        result["nc"] = nc(cv2.imread(args.reference, cv2.IMREAD_GRAYSCALE), extracted)
+    return result, marked.shape[0] * marked.shape[1], "pixels"
+
+def cmd_wm_evaluate(args):
+    import cv2
+    from wm_eval import SCHEMES, run_attack_matrix, write_csv, write_json
+    images = {os.path.basename(p): cv2.imread(p, cv2.IMREAD_COLOR) for p in args.images}
+    schemes = [SCHEMES[s]() for s in args.schemes.split(",")]
+    rows = run_attack_matrix(images, schemes, workers=args.workers)
+    if args.csv:
+        write_csv(rows, args.csv)
+    if args.json:
+        write_json(rows, args.json)
+    return rows, len(rows), "cells"
+
+# ------------------------------
+# --bench / --profile
+# ------------------------------
+
+def _run_bench(func, args, repeat):
+    """预热一次后计时 repeat 次，返回最后一次的结果"""
+    result = func(args)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(args)
+        times.append(time.perf_counter() - t0)
+    _, work, unit = result
+    mean = sum(times) / len(times)
+    report = {"command": args.command_name, "repeat": repeat, "mean_seconds": mean,
+              "min_seconds": min(times), "work": work, "unit": unit,
+              f"{unit}_per_sec": work / mean if mean > 0 else None}
+    print(json.dumps({"bench": report}, ensure_ascii=False), file=sys.stderr)
+    return result
+
+def _run_profile(func, args, prefix, top=25):
+    """cProfile 写入 PREFIX.prof（可用 pstats / snakeviz 查看），tracemalloc 按行统计写入 PREFIX.mem.txt"""
+    import io
+    import pstats
+    import cProfile
+    import tracemalloc
+
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(func, args)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    profiler.dump_stats(prefix + ".prof")
+    with open(prefix + ".mem.txt", "w", encoding="utf-8") as f:
+        f.write(f"current {current} bytes, peak {peak} bytes\n")
+        for stat in snapshot.statistics("lineno")[:top]:
+            f.write(f"{stat}\n")
+
+    buf = io.StringIO()
+    pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(top)
+    print(buf.getvalue(), file=sys.stderr)
+    print(f"profile: {prefix}.prof, {prefix}.mem.txt (峰值 {peak / 2**20:.1f} MiB)", file=sys.stderr)
+    return result
+
+# ------------------------------
+# 参数解析
+# ------------------------------
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="SM2 / PSI / 数字水印 统一命令行")
+    parser.add_argument("--bench", action="store_true", help="预热后重复执行并输出吞吐")
+    parser.add_argument("--bench-repeat", type=int, default=5, metavar="N",
+                        help="--bench 的计时次数（缺省 5）")
+    parser.add_argument("--profile", default=None, metavar="PREFIX",
+                        help="输出 PREFIX.prof（cProfile）与 PREFIX.mem.txt（tracemalloc）")
+    groups = parser.add_subparsers(dest="group", required=True)
+
+    def command(sub, name, func, help):
+        p = sub.add_parser(name, help=help)
+        p.set_defaults(func=func, command_name=f"{sub.dest} {name}")
+        return p
+
+    # sm2
+    sm2 = groups.add_parser("sm2", help="SM2 签名与验签").add_subparsers(dest="sm2", required=True)
+    p = command(sm2, "keygen", cmd_sm2_keygen, "生成密钥对")
+    p.add_argument("--impl", choices=["sm2", "gm"], default="sm2")
+    p.add_argument("--out", required=True, help="私钥文件（JSON）")
+    p.add_argument("--pub", default=None, help="可选：单独输出公钥文件")
+    for name, func, help in (("sign", cmd_sm2_sign, "签名"), ("verify", cmd_sm2_verify, "验签，失败时退出码为 1")):
+        p = command(sm2, name, func, help)
+        p.add_argument("--key", required=True)
+        p.add_argument("--in", dest="input", required=True, help="消息文件，- 表示标准输入")
+        p.add_argument("--uid", default="1234567812345678", help="gm 实现的用户标识")
+        if name == "sign":
+            p.add_argument("--out", default=None, help="签名文件（JSON）")
+        else:
+            p.add_argument("--sig", required=True)
+    p = command(sm2, "analyze", cmd_sm2_analyze, "k 泄露 / 重用攻击验证")
+    p.add_argument("--users", type=int, default=3)
+
+    # psi
+    psi = groups.add_parser("psi", help="DDH 交集和").add_subparsers(dest="psi", required=True)
+    p = command(psi, "run", cmd_psi_run, "计算交集和")
+    p.add_argument("--set-v", required=True, help="Party1 集合，每行一个标识")
+    p.add_argument("--pairs", required=True, action="append", help="Party2 的 标识,权重 文件，可重复")
+    p.add_argument("--group", choices=["modp", "sm2"], default="modp")
+    p.add_argument("--p", type=int, default=2147483647)
+    p.add_argument("--workers", type=int, default=None)
+
+    # wm
+    wm = groups.add_parser("wm", help="数字水印").add_subparsers(dest="wm", required=True)
+    for name, func, help in (("embed", cmd_wm_embed, "嵌入"), ("extract", cmd_wm_extract, "提取")):
+        p = command(wm, name, func, help)
+        p.add_argument("--method", choices=WM_METHODS, default="dwt")
+        p.add_argument("--in", dest="input", required=True)
+        p.add_argument("--out", required=True)
+        p.add_argument("--alpha", type=float, default=0.1)
+        p.add_argument("--level", type=int, default=2, help="color 方法的小波分解级数")
+        p.add_argument("--workers", type=int, default=None)
+        if name == "embed":
+            p.add_argument("--text", default="test watermark")
+            p.add_argument("--watermark", default=None, help="水印图像，缺省按 --text 生成")
+            p.add_argument("--strength", type=float, default=None, help="dct 方法的系数差，缺省按 --quality 计算")
+            p.add_argument("--quality", type=int, default=50, help="dct 方法需经受的 JPEG 质量")
+            p.add_argument("--font-size", type=int, default=50)
+            p.add_argument("--font", default="arial.ttf")
+        else:
+            p.add_argument("--original", default=None, help="原图（dwt / color 需要）")
+            p.add_argument("--wm-shape", type=int, nargs=2, default=[128, 128], metavar=("H", "W"))
+            p.add_argument("--reference", default=None, help="可选：原水印图像，给出时输出 NC")
+            p.add_argument("--sync", action="store_true", help="提取前按 --original 做 FFT 几何重同步")
+    p = command(wm, "evaluate", cmd_wm_evaluate, "攻击矩阵评估")
+    p.add_argument("images", nargs="+")
+    p.add_argument("--schemes", default="lsb,dwt,dct")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--csv", default=None)
+    p.add_argument("--json", default=None)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.exit_code = 0
+    if args.bench_repeat < 1:
+        raise SystemExit("--bench-repeat 至少为 1")
+    if args.profile:
+        result = _run_profile(args.func, args, args.profile)
+    elif args.bench:
+        result = _run_bench(args.func, args, args.bench_repeat)
+    else:
+        result = args.func(args)
+    print(json.dumps(result[0], ensure_ascii=False, indent=2, default=str))
+    return args.exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())